@@ -0,0 +1,68 @@
+from rest_framework import serializers
+
+from manager.models import LandLord, Property, PropertyUnit, Premise, Tenant, Lease
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """Serializes only the fields listed in the request's ?fields= parameter, when given"""
+
+    def __init__(self, *args, **kwargs):
+        super(DynamicFieldsModelSerializer, self).__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or not request.query_params.get('fields'):
+            return
+        wanted = set(request.query_params['fields'].split(','))
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class LandLordSerializer(DynamicFieldsModelSerializer):
+    country_name = serializers.CharField(source='country.name', read_only=True)
+    nationality_name = serializers.CharField(source='nationality.name', read_only=True)
+
+    class Meta:
+        model = LandLord
+        fields = '__all__'
+
+
+class PropertySerializer(DynamicFieldsModelSerializer):
+    land_lord_name = serializers.CharField(source='land_lord.name', read_only=True)
+    country_name = serializers.CharField(source='country.name', read_only=True)
+
+    class Meta:
+        model = Property
+        fields = '__all__'
+
+
+class PropertyUnitSerializer(DynamicFieldsModelSerializer):
+    property_title = serializers.CharField(source='property.title', read_only=True)
+
+    class Meta:
+        model = PropertyUnit
+        fields = '__all__'
+
+
+class PremiseSerializer(DynamicFieldsModelSerializer):
+    property_title = serializers.CharField(source='property.title', read_only=True)
+
+    class Meta:
+        model = Premise
+        fields = '__all__'
+
+
+class TenantSerializer(DynamicFieldsModelSerializer):
+    property_title = serializers.CharField(source='property.title', read_only=True)
+    nationality_name = serializers.CharField(source='nationality.name', read_only=True)
+
+    class Meta:
+        model = Tenant
+        fields = '__all__'
+
+
+class LeaseSerializer(DynamicFieldsModelSerializer):
+    tenant_name = serializers.CharField(source='tenant_lessee.tenant_name', read_only=True)
+    owner_name = serializers.CharField(source='owner_lessor.name', read_only=True)
+
+    class Meta:
+        model = Lease
+        fields = '__all__'
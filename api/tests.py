@@ -1,3 +1,52 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from manager.models import Country, Organisation, PropertyManager, LandLord, Tenant
+from manager.tests import seed_portfolio
+
+
+class ReadOnlyApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portfolio(landlords=30, properties=30, units=5, premises=5, tenants=60)
+        country = Country.objects.get()
+        other = Organisation.objects.create(company_name='Other', address='a', city='c', country=country, phone='1')
+        LandLord.objects.create(name='Not Ours', phone='0', address='a', city='c', country=country,
+                                identification_type='Passport', identification='x', nationality=country, bank='b',
+                                bank_branch='b', bank_account_number='1', managed_by=other)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.data['user'])
+        PropertyManager.objects.for_user(self.data['user'])
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api:landlord-list')).status_code, 403)
+
+    def test_results_are_scoped_to_organisation(self):
+        response = self.client.get(reverse('api:landlord-list'), {'page_size': 100})
+        names = [row['name'] for row in response.json()['results']]
+        self.assertEqual(len(names), 30)
+        self.assertNotIn('Not Ours', names)
+
+    def test_cursor_pagination_walks_every_row_once(self):
+        seen = []
+        url = reverse('api:tenant-list') + '?page_size=25'
+        while url:
+            page = self.client.get(url).json()
+            seen.extend(row['id'] for row in page['results'])
+            url = page['next']
+        self.assertEqual(seen, list(Tenant.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_field_selection(self):
+        response = self.client.get(reverse('api:property-list'), {'fields': 'id,title,land_lord_name'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'title', 'land_lord_name'})
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        for url in ('api:landlord-list', 'api:property-list', 'api:propertyunit-list', 'api:premise-list',
+                    'api:tenant-list', 'api:lease-list'):
+            with self.assertNumQueries(3):
+                self.client.get(reverse(url), {'page_size': 1000})
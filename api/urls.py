@@ -0,0 +1,15 @@
+from rest_framework.routers import DefaultRouter
+
+from . import views
+
+app_name = 'api'
+
+router = DefaultRouter()
+router.register('landlords', views.LandLordViewSet)
+router.register('properties', views.PropertyViewSet)
+router.register('units', views.PropertyUnitViewSet)
+router.register('premises', views.PremiseViewSet)
+router.register('tenants', views.TenantViewSet)
+router.register('leases', views.LeaseViewSet)
+
+urlpatterns = router.urls
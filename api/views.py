@@ -1,3 +1,51 @@
-from django.shortcuts import render
+from rest_framework import viewsets
 
-# Create your views here.
+from api.serializers import LandLordSerializer, PropertySerializer, PropertyUnitSerializer, PremiseSerializer, \
+    TenantSerializer, LeaseSerializer
+from manager.models import LandLord, Property, PropertyUnit, Premise, Tenant, Lease
+
+
+class OrganisationScopedViewSet(viewsets.ReadOnlyModelViewSet):
+    """Read only endpoints limited to rows of the signed in manager's organisation"""
+    organisation_field = None
+
+    def get_queryset(self):
+        return super(OrganisationScopedViewSet, self).get_queryset().filter(
+            **{self.organisation_field: self.request.organisation}
+        )
+
+
+class LandLordViewSet(OrganisationScopedViewSet):
+    queryset = LandLord.objects.select_related('country', 'nationality')
+    serializer_class = LandLordSerializer
+    organisation_field = 'managed_by'
+
+
+class PropertyViewSet(OrganisationScopedViewSet):
+    queryset = Property.objects.select_related('land_lord', 'country')
+    serializer_class = PropertySerializer
+    organisation_field = 'organisation_managing'
+
+
+class PropertyUnitViewSet(OrganisationScopedViewSet):
+    queryset = PropertyUnit.objects.select_related('property')
+    serializer_class = PropertyUnitSerializer
+    organisation_field = 'property__organisation_managing'
+
+
+class PremiseViewSet(OrganisationScopedViewSet):
+    queryset = Premise.objects.select_related('property')
+    serializer_class = PremiseSerializer
+    organisation_field = 'property__organisation_managing'
+
+
+class TenantViewSet(OrganisationScopedViewSet):
+    queryset = Tenant.objects.select_related('property', 'nationality')
+    serializer_class = TenantSerializer
+    organisation_field = 'property__organisation_managing'
+
+
+class LeaseViewSet(OrganisationScopedViewSet):
+    queryset = Lease.objects.select_related('tenant_lessee', 'owner_lessor')
+    serializer_class = LeaseSerializer
+    organisation_field = 'organization_managing'
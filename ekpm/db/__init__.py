@@ -0,0 +1,34 @@
+import dj_database_url
+
+POOLS = ['', 'pgbouncer', 'psycopg2']
+POSTGRESQL_ENGINES = ['django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2']
+
+
+def database_config(url, conn_max_age=600, pool='', statement_timeout=0, ssl_require=False):
+    """
+        A DATABASES entry for a database URL.
+
+        pool is '' for plain connections, 'pgbouncer' when a transaction-pooling PgBouncer sits in front of
+        Postgres, or 'psycopg2' for the in-process pool of ekpm.db.pooled. statement_timeout (milliseconds,
+        0 for none) cancels Postgres statements that run longer. It is sent as a startup parameter, which
+        PgBouncer rejects, so behind PgBouncer set it on the database role instead:
+        ALTER ROLE <user> SET statement_timeout = 30000.
+    """
+
+    if pool not in POOLS:
+        raise ValueError('Unknown database pool %r, use one of %s' % (pool, POOLS))
+    config = dj_database_url.parse(url, conn_max_age=conn_max_age, ssl_require=ssl_require)
+    if config['ENGINE'] not in POSTGRESQL_ENGINES:
+        return config
+
+    if statement_timeout and pool != 'pgbouncer':
+        config.setdefault('OPTIONS', {})['options'] = '-c statement_timeout=%d' % statement_timeout
+    if pool == 'pgbouncer':
+        # Named cursors do not survive PgBouncer handing the server connection to another client between
+        # transactions
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    elif pool == 'psycopg2':
+        config['ENGINE'] = 'ekpm.db.pooled'
+        # Connections go back to the pool at the end of each request instead of staying with the thread
+        config['CONN_MAX_AGE'] = 0
+    return config
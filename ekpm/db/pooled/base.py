@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+
+from django.db.backends.postgresql import base
+from psycopg2 import pool
+
+# One pool per process and database alias, shared by the process's threads. Keyed by process id so a forked
+# child opens its own connections and never touches the sockets of the pool it inherited.
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+# Pause between attempts to borrow a connection while all of them are in use
+POOL_RETRY_INTERVAL = 0.05
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+        PostgreSQL connections borrowed from a per-process psycopg2 pool. Closing a connection, at the end of
+        a request when CONN_MAX_AGE is 0, returns it to the pool rather than disconnecting, so threaded
+        servers reuse a few connections instead of holding one per thread. OPTIONS 'pool_size' connections
+        (2 by default) are kept open, at most 'pool_max' (20) are opened at once. When all of them are in
+        use a thread waits up to 'pool_timeout' seconds (10) for one to be returned.
+    """
+
+    def get_connection_params(self):
+        conn_params = super(DatabaseWrapper, self).get_connection_params()
+        conn_params.pop('pool_size', None)
+        conn_params.pop('pool_max', None)
+        conn_params.pop('pool_timeout', None)
+        return conn_params
+
+    def get_pool(self, conn_params):
+        key = (os.getpid(), self.alias)
+        with POOLS_LOCK:
+            connection_pool = POOLS.get(key)
+            if connection_pool is None:
+                options = self.settings_dict['OPTIONS']
+                connection_pool = POOLS[key] = pool.ThreadedConnectionPool(
+                    options.get('pool_size', 2), options.get('pool_max', 20), **conn_params)
+            return connection_pool
+
+    def borrow(self, connection_pool):
+        """A connection of the pool, waiting for one to be returned while all pool_max are in use"""
+
+        timeout = self.settings_dict['OPTIONS'].get('pool_timeout', 10)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return connection_pool.getconn()
+            except pool.PoolError:
+                if connection_pool.closed:
+                    raise
+                if time.monotonic() >= deadline:
+                    # Raised as django.db.OperationalError, like a refused connection
+                    raise base.Database.OperationalError(
+                        'All %s connections of the %r database pool are still in use after %ss, raise its '
+                        'pool_max option or lower the number of threads' % (connection_pool.maxconn, self.alias,
+                                                                            timeout))
+                time.sleep(POOL_RETRY_INTERVAL)
+
+    def get_new_connection(self, conn_params):
+        connection = self.borrow(self.get_pool(conn_params))
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get('isolation_level', connection.isolation_level)
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # Connections that saw errors may be broken, they are closed rather than reused
+                POOLS[os.getpid(), self.alias].putconn(self.connection, close=self.errors_occurred)
+
+    def close_pool(self):
+        """Disconnects the idle connections this process keeps in the alias's pool"""
+
+        with POOLS_LOCK:
+            connection_pool = POOLS.pop((os.getpid(), self.alias), None)
+        if connection_pool is not None:
+            connection_pool.closeall()
@@ -0,0 +1,61 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+REPLICA = 'replica'
+# Holds the time until which a client's reads stay on the primary, set by pin_primary()
+PRIMARY_COOKIE = 'ekpm_primary_until'
+
+_state = threading.local()
+
+
+@contextmanager
+def replica_reads():
+    """Sends the reads made inside the block to the replica, up to the first write"""
+
+    previous = getattr(_state, 'replica', False), getattr(_state, 'wrote', False)
+    _state.replica, _state.wrote = True, False
+    try:
+        yield
+    finally:
+        _state.replica, _state.wrote = previous
+
+
+def pin_primary(response):
+    """Keeps the client's reads on the primary for REPLICA_STICKY_SECONDS, until the replica has caught up"""
+
+    seconds = settings.REPLICA_STICKY_SECONDS
+    response.set_cookie(PRIMARY_COOKIE, '%d' % (time.time() + seconds), max_age=seconds, httponly=True)
+    return response
+
+
+def primary_pinned(request):
+    try:
+        return float(request.COOKIES.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRouter(object):
+    """
+        Reads go to the 'replica' database inside replica_reads(), everything else to 'default'. Once a block
+        has written, its later reads go to 'default' too, so they see the write. The replica is a copy of
+        'default', so relations between their objects are allowed and only 'default' is migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'replica', False) and not getattr(_state, 'wrote', False):
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,48 @@
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def has_statement_timeout(connection):
+    """
+        Whether the connection was opened with DATABASE_STATEMENT_TIMEOUT (see ekpm.db.database_config). Never
+        behind PgBouncer, where the timeout is set on the role and a SET would outlive the transaction on a
+        server connection shared with other clients.
+    """
+
+    return connection.vendor == 'postgresql' and \
+        'statement_timeout' in connection.settings_dict.get('OPTIONS', {}).get('options', '')
+
+
+def lift_statement_timeout(sender, connection, **kwargs):
+    if has_statement_timeout(connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SET statement_timeout = 0')
+
+
+@contextmanager
+def without_statement_timeout():
+    """Lets the statements run inside the block take as long as they need, on open and new connections"""
+
+    connection_created.connect(lift_statement_timeout, dispatch_uid='without_statement_timeout')
+    for connection in connections.all():
+        if connection.connection is not None:
+            lift_statement_timeout(None, connection)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(dispatch_uid='without_statement_timeout')
+        for connection in connections.all():
+            if connection.connection is not None and has_statement_timeout(connection):
+                with connection.cursor() as cursor:
+                    # Back to the timeout the connection was opened with
+                    cursor.execute('RESET statement_timeout')
+
+
+class NoStatementTimeoutMixin(object):
+    """For management commands that may legitimately run longer than DATABASE_STATEMENT_TIMEOUT"""
+
+    def execute(self, *args, **options):
+        with without_statement_timeout():
+            return super(NoStatementTimeoutMixin, self).execute(*args, **options)
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 import django_heroku
+from django.core.exceptions import ImproperlyConfigured
+from ekpm.db import database_config
 from django.utils.translation import ugettext_lazy as _
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -25,7 +27,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = '(w(ovk-hhubmb_n3f1%uki@_e&9hr2s@+3vu310mx%10y#a7j%'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = [
     '127.0.0.1',
@@ -58,19 +60,26 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'manager.middleware.PropertyManagerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'ekpm.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')]
         ,
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept for the life of the process unless DEBUG is on
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -87,11 +96,72 @@ WSGI_APPLICATION = 'ekpm.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# DATABASE_URL picks the database (Heroku sets it), SQLite in the project directory otherwise.
+# DATABASE_CONN_MAX_AGE: seconds a connection is kept for later requests, 0 to close it after each one.
+# DATABASE_POOL: 'pgbouncer' behind a transaction-pooling PgBouncer, 'psycopg2' for an in-process pool.
+# DATABASE_STATEMENT_TIMEOUT: milliseconds after which Postgres cancels a statement, 0 for no limit. Ignored
+# behind PgBouncer, use ALTER ROLE ... SET statement_timeout there. Long management commands lift it
+# (ekpm.db.timeouts).
+# DATABASE_REPLICA_URL: a read replica of the database, see ekpm/db/routers.py.
+
+DATABASE_CONN_MAX_AGE = int(os.environ.get('DATABASE_CONN_MAX_AGE', 600))
+DATABASE_POOL = os.environ.get('DATABASE_POOL', '')
+DATABASE_STATEMENT_TIMEOUT = int(os.environ.get('DATABASE_STATEMENT_TIMEOUT', 30000))
+DATABASE_OPTIONS = {
+    'conn_max_age': DATABASE_CONN_MAX_AGE,
+    'pool': DATABASE_POOL,
+    'statement_timeout': DATABASE_STATEMENT_TIMEOUT,
+    # Heroku Postgres only accepts SSL connections
+    'ssl_require': 'DYNO' in os.environ,
+}
+
 DATABASES = {
+    'default': database_config(
+        os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(BASE_DIR, 'db.sqlite3')), **DATABASE_OPTIONS
+    ),
+}
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dict(database_config(os.environ['DATABASE_REPLICA_URL'], **DATABASE_OPTIONS),
+                                TEST={'MIRROR': 'default'})
+    DATABASE_ROUTERS = ['ekpm.db.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# CACHE_BACKEND picks the backend, CACHE_LOCATION is its name, directory or redis:// url. The redis backend is
+# provided by the django-redis package and works against any Redis-compatible server.
+# Writes retire cached detail pages, manager profiles and the country table through this cache, so every
+# process must share it: locmem is per process and only does under DEBUG, 'file' serves the processes of one
+# machine and 'redis' several machines.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'file')
+if CACHE_BACKEND == 'locmem' and not DEBUG:
+    raise ImproperlyConfigured("CACHE_BACKEND 'locmem' is not shared by the server's processes, other processes "
+                               "would keep serving stale pages: use 'file' or 'redis' with DEBUG off")
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('CACHE_LOCATION', {
+            'locmem': 'ekpm',
+            'file': os.path.join(BASE_DIR, '.cache'),
+            'redis': 'redis://127.0.0.1:6379/1',
+        }[CACHE_BACKEND]),
+        'KEY_PREFIX': 'ekpm',
+        'OPTIONS': {} if CACHE_BACKEND == 'redis' else {'MAX_ENTRIES': 10000},
+    },
+    # {% cache ... using='templates' %} fragments of base.html: they only change with the code, so each process
+    # keeps its own and a deploy starts afresh. Off under DEBUG so template edits show up at once.
+    'templates': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache' if DEBUG else
+        'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ekpm-templates',
+    },
 }
 
 
@@ -138,7 +208,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
 
 
-django_heroku.settings(locals())
+# DATABASES is configured above
+django_heroku.settings(locals(), databases=False)
 
 AUTH_USER_MODEL = 'manager.User'
 
@@ -147,6 +218,11 @@ LOGOUT_REDIRECT_URL = 'landing_page'
 
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
+REST_FRAMEWORK = {
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.IdCursorPagination',
+}
+
 
 # Platform Constants
 ID_TYPES = [
@@ -173,3 +249,30 @@ ACCOMMODATION_TYPES = [
     (_('Houses'), _('Houses')),
 ]
 
+# Background geocoding (manage.py geocode_worker)
+GEOCODER_TIMEOUT = 10
+GEOCODER_MAX_ATTEMPTS = 5
+GEOCODER_BACKOFF = 30
+GEOCODER_MAX_BACKOFF = 60 * 60
+# Running jobs not finished after this many seconds are claimed again
+GEOCODER_JOB_TIMEOUT = 60 * 10
+GEOCODE_CACHE_TTL = 60 * 60 * 24 * 90
+
+# Lease calendar: annual rent reviews are precomputed this many years ahead (manage.py rebuild_lease_events)
+LEASE_EVENT_HORIZON_YEARS = 10
+
+# Countries are served from a per-process table (Country.objects.table()); how often a process checks the
+# shared default cache (see CACHE_BACKEND) for changes made by other processes, the longest a change takes to
+# reach them
+COUNTRY_TABLE_CHECK_SECONDS = 30
+
+# Rendered Property, LandLord, Tenant and Lease detail pages are cached for at most this many seconds; saving
+# or deleting anything a page shows retires it sooner
+DETAIL_PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Landlord owner statements are written under this directory (manage.py owner_statements)
+OWNER_STATEMENT_DIR = os.path.join(BASE_DIR, 'statements')
+
+# After a POST a user's reads stay on the primary database for this many seconds, long enough for the read
+# replica to catch up with their change (see ekpm/db/routers.py)
+REPLICA_STICKY_SECONDS = 10
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import Organisation, Country, PropertyManager, User, LandLord, PropertyUnit, Property, Premise, Tenant, \
-    Lease
+    Lease, GeocodeJob, GeocodeCache, OrganisationStats, LeaseEvent, PropertyOccupancy
 
 
 admin.site.register(User)
@@ -13,3 +13,8 @@ admin.site.register(PropertyUnit)
 admin.site.register(Premise)
 admin.site.register(Tenant)
 admin.site.register(Lease)
+admin.site.register(GeocodeJob)
+admin.site.register(GeocodeCache)
+admin.site.register(OrganisationStats)
+admin.site.register(LeaseEvent)
+admin.site.register(PropertyOccupancy)
@@ -0,0 +1,42 @@
+from manager.models import Country, LandLord, Premise, PropertyUnit
+
+LIMIT = 20
+
+
+def landlords(organisation, term, property_id=None):
+    return LandLord.objects.filter(managed_by=organisation, name__istartswith=term).order_by('name', 'id') \
+        .values_list('id', 'name')
+
+
+def countries(organisation, term, property_id=None):
+    term = term.lower()
+    return [(country.pk, country.name) for country in Country.objects.table().countries
+            if country.name.lower().startswith(term)]
+
+
+def premises(organisation, term, property_id=None):
+    return Premise.objects.filter(
+        property_id=property_id, property__organisation_managing=organisation, premise_title__istartswith=term
+    ).order_by('premise_title', 'id').values_list('id', 'premise_title')
+
+
+def units(organisation, term, property_id=None):
+    return PropertyUnit.objects.filter(
+        property_id=property_id, property__organisation_managing=organisation, unit_title__istartswith=term
+    ).order_by('unit_title', 'id').values_list('id', 'unit_title')
+
+
+# kind: (lookup, whether the lookup needs ?property=)
+LOOKUPS = {
+    'landlords': (landlords, False),
+    'countries': (countries, False),
+    'premises': (premises, True),
+    'units': (units, True),
+}
+
+
+def autocomplete(kind, organisation, term, property_id=None, limit=LIMIT):
+    """(id, label) of the first `limit` options of a lazy select whose label starts with `term`"""
+
+    lookup, needs_property = LOOKUPS[kind]
+    return list(lookup(organisation, term.strip(), property_id)[:limit])
@@ -0,0 +1,110 @@
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from manager.models import Allocation, ArrearsAgeing, BillingRun, Lease, LedgerEntry, ZERO, month_end
+
+CHUNK_SIZE = 2000
+CENT = Decimal('0.01')
+BILLING_FIELDS = ['organization_managing', 'monthly_rent_amount', 'monthly_rate', 'monthly_recovery_amount',
+                  'late_payment_interest_percentage']
+
+
+def cents(amount):
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def period_charges(lease, brought_forward):
+    """
+        (kind, amount) of the charges a lease raises for a month. Rates are monthly_rate percent of the rent and
+        late interest is late_payment_interest_percentage percent a month of the balance brought forward, when
+        the account is in arrears. A lease running on any day of the month is charged for the whole month.
+    """
+
+    charges = [
+        (LedgerEntry.RENT, lease.monthly_rent_amount),
+        (LedgerEntry.RATES, cents(lease.monthly_rent_amount * lease.monthly_rate / 100)),
+        (LedgerEntry.RECOVERY, lease.monthly_recovery_amount),
+    ]
+    if brought_forward > 0:
+        charges.append((LedgerEntry.INTEREST, cents(brought_forward * lease.late_payment_interest_percentage / 100)))
+    return [(kind, amount) for kind, amount in charges if amount > 0]
+
+
+def billable_leases(organisation, period):
+    """Active leases of an organisation running on at least one day of the month starting `period`"""
+
+    return Lease.objects.filter(
+        Q(lease_ends__isnull=True) | Q(lease_ends__gte=period) | Q(lease_indefinite_thereafter=True),
+        organization_managing=organisation, is_active=True, lease_starts__lte=month_end(period)
+    )
+
+
+def bill_chunk(run, lease_ids):
+    """Charges the leases among lease_ids not yet billed for the run's month, in one transaction"""
+
+    period = run.period
+    with transaction.atomic():
+        LedgerEntry.objects.lock(lease_ids)
+        leases = LedgerEntry.objects.balances(Lease.objects.filter(pk__in=lease_ids).only(*BILLING_FIELDS)).annotate(
+            billed=Exists(LedgerEntry.objects.filter(lease=OuterRef('pk'), period=period,
+                                                     kind__in=LedgerEntry.CHARGES))
+        ).filter(billed=False)
+
+        entries = []
+        in_credit = []
+        for lease in leases:
+            balance = lease.balance or ZERO
+            if balance < 0:
+                in_credit.append(lease.pk)
+            for kind, amount in period_charges(lease, balance):
+                balance += amount
+                entries.append(LedgerEntry(
+                    organisation_id=lease.organization_managing_id, lease_id=lease.pk, kind=kind, period=period,
+                    date=period, amount=amount, balance=balance, billing_run=run
+                ))
+        LedgerEntry.objects.bulk_create(entries)
+        # Payments made in advance settle the new charges
+        if in_credit:
+            Allocation.objects.allocate(in_credit)
+        billed = {entry.lease_id for entry in entries}
+        ArrearsAgeing.objects.refresh(billed)
+    return len(billed), entries
+
+
+def bill(organisation, period, chunk_size=CHUNK_SIZE):
+    """
+        Raises the month's rent, rates, recovery and interest charges of an organisation's leases, chunk_size
+        leases per transaction. Leases already billed for the month are skipped, so an interrupted or repeated
+        run only adds what is missing. Returns the BillingRun.
+    """
+
+    period = period.replace(day=1)
+    run, created = BillingRun.objects.get_or_create(organisation=organisation, period=period)
+    run.status, run.finished = BillingRun.RUNNING, None
+    run.save()
+
+    leases = billable_leases(organisation, period).order_by('pk').values_list('pk', flat=True)
+    last_pk = 0
+    while True:
+        lease_ids = list(leases.filter(pk__gt=last_pk)[:chunk_size])
+        if not lease_ids:
+            break
+        billed, entries = bill_chunk(run, lease_ids)
+        run.leases += billed
+        run.charges += len(entries)
+        run.total += sum(entry.amount for entry in entries)
+        last_pk = lease_ids[-1]
+
+    run.status, run.finished = BillingRun.DONE, timezone.now()
+    run.save()
+    return run
+
+
+def parse_period(value):
+    """The first day of a YYYY-MM month"""
+
+    return datetime.datetime.strptime(value, '%Y-%m').date()
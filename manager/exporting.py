@@ -0,0 +1,89 @@
+import csv
+
+from django.db.models import Case, CharField, F, When
+
+from manager.models import Property, Tenant, Lease
+
+CHUNK_SIZE = 2000
+
+
+class Echo(object):
+    """File-like object for csv.writer that hands each line back instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def properties(organisation):
+    return Property.objects.filter(organisation_managing=organisation).order_by('id').values_list(
+        'id', 'title', 'property_type', 'land_lord__name', 'address', 'city', 'country__name', 'property_value',
+        'lot_size', 'building_size', 'latitude', 'longitude', 'is_active'
+    )
+
+
+def tenants(organisation):
+    return Tenant.objects.filter(property__organisation_managing=organisation).order_by('id').values_list(
+        'id', 'tenant_name', 'trading_as_list_name', 'property__title', 'identification_type', 'identification',
+        'email_1', 'phone_1', 'nationality__name', 'lease_id', 'is_active'
+    )
+
+
+def leases(organisation):
+    return Lease.objects.filter(organization_managing=organisation).order_by('id').values_list(
+        'id', 'tenant_lessee__tenant_name', 'owner_lessor__name', 'tenant_lessee__property__title',
+        'premises__premise_title', 'property_unit__unit_title', 'lease_starts', 'occupation_date', 'lease_ends',
+        'rent_review_date', 'annual_rent_review_date', 'monthly_rent_amount', 'escalation_percentage',
+        'monthly_recovery_amount', 'cash_deposit_amount', 'is_active'
+    )
+
+
+def rent_roll(organisation):
+    """Active leases by property with the rent and recoveries due each month"""
+
+    return Lease.objects.filter(organization_managing=organisation, is_active=True).annotate(
+        space=Case(When(premises__isnull=False, then=F('premises__premise_title')),
+                   default=F('property_unit__unit_title'), output_field=CharField())
+    ).order_by('tenant_lessee__property__title', 'id').values_list(
+        'tenant_lessee__property__title', 'owner_lessor__name', 'space', 'tenant_lessee__tenant_name', 'id',
+        'lease_starts', 'lease_ends', 'monthly_rent_amount', 'monthly_recovery_amount', 'escalation_percentage',
+        'annual_rent_review_date'
+    )
+
+
+EXPORTS = {
+    'properties': (properties, [
+        'id', 'title', 'property type', 'landlord', 'address', 'city', 'country', 'value', 'lot size',
+        'building size', 'latitude', 'longitude', 'active'
+    ]),
+    'tenants': (tenants, [
+        'id', 'name', 'trading as', 'property', 'identification type', 'identification', 'email', 'phone',
+        'nationality', 'lease', 'active'
+    ]),
+    'leases': (leases, [
+        'id', 'tenant', 'landlord', 'property', 'premises', 'unit', 'starts', 'occupation', 'ends', 'rent review',
+        'annual rent review', 'monthly rent', 'escalation %', 'monthly recovery', 'cash deposit', 'active'
+    ]),
+    'rent-roll': (rent_roll, [
+        'property', 'landlord', 'space', 'tenant', 'lease', 'starts', 'ends', 'monthly rent', 'monthly recovery',
+        'escalation %', 'annual rent review'
+    ]),
+}
+
+
+def export_rows(kind, organisation, chunk_size=CHUNK_SIZE):
+    """
+        The header then one tuple per row, fetched chunk_size rows at a time as plain values
+        (a server-side cursor on PostgreSQL) so memory use does not grow with the export
+    """
+
+    queryset, header = EXPORTS[kind]
+    yield header
+    yield from queryset(organisation).iterator(chunk_size=chunk_size)
+
+
+def export_csv(kind, organisation, chunk_size=CHUNK_SIZE):
+    """Streams an export as CSV lines"""
+
+    writer = csv.writer(Echo())
+    for row in export_rows(kind, organisation, chunk_size):
+        yield writer.writerow(row)
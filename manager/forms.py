@@ -1,7 +1,11 @@
+import copy
+from urllib.parse import urlencode
+
 from django import forms
-from geopy.exc import GeocoderServiceError
-from geopy.geocoders import Nominatim, ArcGIS
-from manager.models import LandLord, Property, PropertyManager, PropertyUnit, Premise, Tenant, Lease
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from manager.geocoding import address_query, cached_location
+from manager.models import Country, LandLord, Property, PropertyUnit, Premise, Tenant, Lease, GeocodeJob
 from django.utils.translation import ugettext_lazy as _
 
 text_input_style = 'ui-inputfield ui-inputtext ui-widget ui-state-default ui-corner-all'
@@ -9,10 +13,63 @@ text_area_style = 'ui-inputfield ui-inputtextarea ui-widget ui-state-default ui-
 select_one_menu_style = 'ui-selectonemenu ui-widget ui-state-default ui-corner-all'
 
 
+class AutocompleteSelect(forms.Select):
+    """
+        A model select rendered with only its chosen option, the other options are fetched from the
+        manager:autocomplete endpoint as the user types (static/resource/js/autocomplete.js)
+    """
+
+    def __init__(self, kind, params=None, attrs=None):
+        super(AutocompleteSelect, self).__init__(attrs={'class': select_one_menu_style, **(attrs or {})})
+        self.kind = kind
+        self.params = params or {}
+
+    def get_context(self, name, value, attrs):
+        context = super(AutocompleteSelect, self).get_context(name, value, attrs)
+        url = reverse('manager:autocomplete', args=[self.kind])
+        if self.params:
+            url = '%s?%s' % (url, urlencode(self.params))
+        context['widget']['attrs']['data-autocomplete'] = url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        chosen = [v for v in value if v not in (None, '')]
+        try:
+            if hasattr(field, 'cached_instances'):
+                instances = field.cached_instances(chosen)
+            else:
+                instances = list(self.choices.queryset.filter(pk__in=chosen)) if chosen else []
+        except (ValueError, TypeError, ValidationError):
+            instances = []
+        widget = copy.copy(self)
+        widget.choices = [('', field.empty_label or '')] + [
+            (field.prepare_value(instance), field.label_from_instance(instance)) for instance in instances
+        ]
+        return super(AutocompleteSelect, widget).optgroups(name, value, attrs)
+
+
+class CountryChoiceField(forms.ModelChoiceField):
+    """A country choice checked against the in-process country table rather than the database"""
+
+    def cached_instances(self, values):
+        by_id = Country.objects.table().by_id
+        return [by_id[int(value)] for value in values if int(value) in by_id]
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return Country.objects.table().by_id[int(value)]
+        except (KeyError, ValueError, TypeError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
 class LandLordForm(forms.ModelForm):
     class Meta:
         model = LandLord
         exclude = ['managed_by', 'date_created', 'last_updated', 'is_active']
+        field_classes = {'country': CountryChoiceField, 'nationality': CountryChoiceField}
         widgets = {
             'name': forms.TextInput(attrs={'class': text_input_style}),
             'phone': forms.TextInput(attrs={'class': text_input_style}),
@@ -22,28 +79,33 @@ class LandLordForm(forms.ModelForm):
             'bank': forms.TextInput(attrs={'class': text_input_style}),
             'bank_branch': forms.TextInput(attrs={'class': text_input_style}),
             'bank_account_number': forms.TextInput(attrs={'class': text_input_style}),
+            'management_fee_percentage': forms.NumberInput(attrs={'class': text_input_style}),
             'details': forms.Textarea(attrs={'class': text_area_style}),
             'representative': forms.TextInput(attrs={'class': text_input_style}),
+            'country': AutocompleteSelect('countries'),
+            'nationality': AutocompleteSelect('countries'),
+        }
+        labels = {
+            'management_fee_percentage': _('Management Fee (%)'),
         }
 
 
 class PropertyForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
-        user = kwargs.pop('user')
+        organisation = kwargs.pop('organisation')
         super(PropertyForm, self).__init__(*args, **kwargs)
-        self.fields['land_lord'].queryset = LandLord.objects.filter(
-            managed_by=PropertyManager.objects.get(
-                user=user
-            ).organisation
-        )
+        self.fields['land_lord'].queryset = LandLord.objects.filter(managed_by=organisation)
 
     class Meta:
         model = Property
-        exclude = ['organisation_managing', 'geographic_location', 'date_created', 'last_updated', 'is_active']
+        exclude = ['organisation_managing', 'geographic_location', 'latitude', 'longitude', 'date_created',
+                   'last_updated', 'is_active']
+        field_classes = {'country': CountryChoiceField}
         widgets = {
             'title': forms.TextInput(attrs={'class': text_input_style}),
-            'land_lord': forms.Select(attrs={'class': select_one_menu_style}),
+            'land_lord': AutocompleteSelect('landlords'),
+            'country': AutocompleteSelect('countries'),
             'first_erected_date': forms.SelectDateWidget(years=range(1900, 2100)),
             'property_acquired_date': forms.SelectDateWidget(years=range(1900, 2100)),
             'management_started_date': forms.SelectDateWidget(years=range(1900, 2100)),
@@ -73,18 +135,22 @@ class PropertyForm(forms.ModelForm):
 
     def save(self, commit=True):
         property_obj = super(PropertyForm, self).save(commit=False)
-        geolocator = ArcGIS(user_agent="eKPM")
-        address = self.cleaned_data['address']
-        city = self.cleaned_data['city']
-        country = self.cleaned_data['country']
-        try:
-            property_obj.geographic_location = geolocator.geocode(address + " " + city + " " + country.name)
-            print("**************GeoCode success***************")
-        except GeocoderServiceError:
-            property_obj.geographic_location = (address + " " + city + " " + country.name)
-            print("**************GeoCode failed***************")
+        entry = None
+        address_changed = property_obj.pk is None or bool({'address', 'city', 'country'} & set(self.changed_data))
+        if address_changed:
+            query = address_query(self.cleaned_data['address'], self.cleaned_data['city'], self.cleaned_data['country'])
+            entry = cached_location(query)
+            # The raw address stands in until the geocode_worker resolves it
+            if entry is not None and entry.found:
+                property_obj.geographic_location = entry.label
+                property_obj.latitude, property_obj.longitude = entry.latitude, entry.longitude
+            else:
+                property_obj.geographic_location = query
+                property_obj.latitude = property_obj.longitude = None
         if commit:
             property_obj.save()
+            if address_changed and entry is None:
+                GeocodeJob.objects.enqueue(property_obj)
 
         return property_obj
 
@@ -92,7 +158,7 @@ class PropertyForm(forms.ModelForm):
 class PropertyUnitForm(forms.ModelForm):
     class Meta:
         model = PropertyUnit
-        exclude = ['property', 'date_created', 'last_updated', 'is_active']
+        exclude = ['property', 'date_created', 'last_updated', 'is_active', 'is_vacant']
         widgets = {
             'unit_title': forms.TextInput(attrs={'class': text_input_style}),
             'total_area': forms.NumberInput(attrs={'class': text_input_style}),
@@ -106,7 +172,7 @@ class PropertyUnitForm(forms.ModelForm):
 class PremiseForm(forms.ModelForm):
     class Meta:
         model = Premise
-        exclude = ['property', 'date_created', 'last_updated', 'is_active']
+        exclude = ['property', 'date_created', 'last_updated', 'is_active', 'is_vacant']
         labels = {
             'total_area': _('Total Area (sqmts)'),
         }
@@ -121,6 +187,7 @@ class TenantForm(forms.ModelForm):
     class Meta:
         model = Tenant
         exclude = ['property', 'date_created', 'last_updated', 'is_active', 'lease']
+        field_classes = {'nationality': CountryChoiceField}
         labels = {
             'tenant_name': _('Tenant Name*'),
             'trading_as_list_name': _('Trading As / List Name*'),
@@ -146,6 +213,7 @@ class TenantForm(forms.ModelForm):
             'postal_address': forms.Textarea(attrs={'class': text_area_style}),
             'domicile_address': forms.Textarea(attrs={'class': text_area_style}),
             'details': forms.Textarea(attrs={'class': text_area_style}),
+            'nationality': AutocompleteSelect('countries'),
         }
 
 
@@ -156,12 +224,15 @@ class LeaseForm(forms.ModelForm):
         super(LeaseForm, self).__init__(*args, **kwargs)
         self.fields['premises'].queryset = Premise.objects.filter(property_id=property_id)
         self.fields['property_unit'].queryset = PropertyUnit.objects.filter(property_id=property_id)
+        self.fields['premises'].widget.params = self.fields['property_unit'].widget.params = {'property': property_id}
 
     class Meta:
         model = Lease
         exclude = ['tenant_lessee', 'owner_lessor', 'organization_managing', 'created_by_manager',
                    'is_active', 'date_created', 'last_updated']
         widgets = {
+            'premises': AutocompleteSelect('premises'),
+            'property_unit': AutocompleteSelect('units'),
             'lease_starts': forms.SelectDateWidget(years=range(2019, 2100)),
             'occupation_date': forms.SelectDateWidget(years=range(2019, 2100)),
             'lease_ends': forms.SelectDateWidget(years=range(1900, 2019)),
@@ -0,0 +1,113 @@
+import datetime
+import re
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from geopy.exc import GeopyError
+from geopy.geocoders import ArcGIS
+
+from manager.models import GeocodeJob, GeocodeCache, Property, retire_detail_pages
+
+
+def address_query(address, city, country):
+    """The free text address sent to the geocoder"""
+
+    return address + " " + city + " " + country.name
+
+
+def normalise_address(query):
+    """Cache key for an address: lower case, punctuation dropped and whitespace collapsed"""
+
+    return ' '.join(re.sub(r'[^\w\s]', ' ', query.lower()).split())[:255]
+
+
+def geocode(query):
+    """Looks up an address, returns a geopy Location or None when nothing matched"""
+
+    geolocator = ArcGIS(user_agent="eKPM", timeout=settings.GEOCODER_TIMEOUT)
+    return geolocator.geocode(query)
+
+
+def cached_location(query):
+    """Returns the cached, unexpired result for an address (counting the hit) or None"""
+
+    key = normalise_address(query)
+    expiry = timezone.now() - datetime.timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+    entry = GeocodeCache.objects.filter(address=key, date_cached__gte=expiry).first()
+    if entry is not None:
+        GeocodeCache.objects.filter(pk=entry.pk).update(hits=F('hits') + 1)
+    return entry
+
+
+def store_location(query, location):
+    """Caches a geocoder result, a None location is cached too so unknown addresses are not retried"""
+
+    entry, created = GeocodeCache.objects.update_or_create(
+        address=normalise_address(query),
+        defaults={
+            'label': str(location)[:255] if location is not None else '',
+            'latitude': location.latitude if location is not None else None,
+            'longitude': location.longitude if location is not None else None,
+            'date_cached': timezone.now(),
+        }
+    )
+    GeocodeCache.objects.filter(pk=entry.pk).update(misses=F('misses') + 1)
+    return entry
+
+
+def retry_delay(attempts):
+    """Exponential backoff between attempts, capped at GEOCODER_MAX_BACKOFF seconds"""
+
+    return datetime.timedelta(seconds=min(settings.GEOCODER_BACKOFF * 2 ** (attempts - 1),
+                                          settings.GEOCODER_MAX_BACKOFF))
+
+
+def retry_later(job, error):
+    """Records a failed attempt, the job is retried with backoff until GEOCODER_MAX_ATTEMPTS"""
+
+    job.last_error = repr(error)
+    if job.attempts >= settings.GEOCODER_MAX_ATTEMPTS:
+        job.status = GeocodeJob.FAILED
+    else:
+        job.status = GeocodeJob.PENDING
+        job.run_after = timezone.now() + retry_delay(job.attempts)
+    job.save()
+    return job
+
+
+def run_job(job):
+    """Geocodes the job's property. Failed lookups are retried with backoff until GEOCODER_MAX_ATTEMPTS."""
+
+    job.attempts += 1
+    property_obj = job.property
+    query = address_query(property_obj.address, property_obj.city, property_obj.country)
+    entry = cached_location(query)
+    if entry is None:
+        try:
+            entry = store_location(query, geocode(query))
+        except GeopyError as e:
+            return retry_later(job, e)
+
+    if entry.found:
+        Property.objects.filter(pk=property_obj.pk).update(
+            geographic_location=entry.label, latitude=entry.latitude, longitude=entry.longitude
+        )
+        retire_detail_pages(Property, [property_obj.pk])
+    job.status = GeocodeJob.DONE
+    job.last_error = ''
+    job.save()
+    return job
+
+
+def run_pending(limit=50):
+    """Runs jobs that are due, returns how many were processed"""
+
+    jobs = GeocodeJob.objects.claim(limit)
+    for job in jobs:
+        try:
+            run_job(job)
+        except Exception as e:
+            # Anything else is retried too rather than stopping the worker with the batch left running
+            retry_later(job, e)
+    return len(jobs)
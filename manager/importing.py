@@ -0,0 +1,344 @@
+import csv
+import datetime
+import itertools
+import os
+
+from django import forms
+from django.db import IntegrityError, transaction
+
+from manager.forms import LandLordForm, PropertyForm, TenantForm, LeaseForm
+from manager.geocoding import address_query
+from manager.models import Country, LandLord, Property, PropertyUnit, Premise, Tenant, Lease, LeaseEvent, \
+    GeocodeJob, OrganisationStats, PropertyOccupancy, SearchEntry, refresh_vacancy, retire_detail_pages
+from manager.seeding import last_id
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def read_xlsx(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError('Importing .xlsx files requires openpyxl (pip install openpyxl)')
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [str(h).strip() if h is not None else '' for h in next(rows, [])]
+        for values in rows:
+            row = {}
+            for header, value in zip(headers, values):
+                if isinstance(value, (datetime.date, datetime.datetime)):
+                    value = value.strftime('%Y-%m-%d')
+                row[header] = '' if value is None else str(value)
+            yield row
+    finally:
+        workbook.close()
+
+
+def read_rows(path):
+    """Streams the rows of a .csv or .xlsx file as dicts keyed by the header row"""
+
+    if os.path.splitext(path)[1].lower() == '.xlsx':
+        return read_xlsx(path)
+    return read_csv(path)
+
+
+class PreloadedModelChoiceField(forms.Field):
+    """
+        Stands in for a ModelChoiceField during imports: the allowed primary keys are loaded once,
+        so validating a row does not query the database
+    """
+    default_error_messages = {
+        'invalid_choice': 'Select a valid choice. That choice is not one of the available choices.',
+    }
+
+    def __init__(self, model, pks, **kwargs):
+        self.model = model
+        self.pks = pks
+        super(PreloadedModelChoiceField, self).__init__(**kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            pk = None
+        if pk not in self.pks:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return self.model(pk=pk)
+
+
+class ImportReport(object):
+    """Counts imported rows and writes one line per row error to a CSV file"""
+
+    def __init__(self, path=None):
+        self.imported = 0
+        self.failed = 0
+        self.file = open(path, 'w', newline='') if path else None
+        self.writer = csv.writer(self.file) if self.file else None
+        if self.writer:
+            self.writer.writerow(['line', 'field', 'error'])
+
+    def error(self, line, errors):
+        self.failed += 1
+        if self.writer:
+            for field, messages in errors.items():
+                for message in messages:
+                    self.writer.writerow([line, field, message])
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+class ModelImporter(object):
+    """
+        Validates rows with the model's portal form and inserts them with bulk_create, one transaction
+        per batch. Foreign keys are given by natural key (country code, landlord identification, ...)
+        and resolved from maps loaded once per import. Memory use depends on the batch size, not the file.
+    """
+    model = None
+    form_class = None
+
+    def __init__(self, manager, batch_size=1000, report=None):
+        self.manager = manager
+        self.organisation = manager.organisation
+        self.batch_size = batch_size
+        self.report = report or ImportReport()
+        self.country_table = Country.objects.table()
+        self.countries = {code: country.pk for code, country in self.country_table.by_code.items()}
+        self.lookups = self.get_lookups()
+        # Blank or missing columns take the model default, as the portal forms show them pre-filled
+        self.defaults = {field.name: str(field.get_default()) for field in self.model._meta.fields
+                         if field.has_default() and not field.is_relation}
+        self.import_form_class = type('Import' + self.form_class.__name__, (self.form_class,), {
+            # Unique fields are enforced by the database when the batch is inserted
+            'validate_unique': lambda form: None,
+        })
+
+    def get_lookups(self):
+        """Form field -> {natural key: pk} for the foreign keys given in the file"""
+
+        return {}
+
+    def get_form_kwargs(self):
+        return {}
+
+    def clean_row(self, row):
+        data = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        for field, default in self.defaults.items():
+            if not data.get(field):
+                data[field] = default
+        return data
+
+    def row_to_data(self, row):
+        data = self.clean_row(row)
+        for field, keys in self.lookups.items():
+            if data.get(field):
+                data[field] = keys.get(self.normalise_key(field, data[field]), 'unknown')
+        return data
+
+    def normalise_key(self, field, value):
+        return value.upper() if field in ('country', 'nationality') else value
+
+    def get_form(self, data):
+        form = self.import_form_class(data, **self.get_form_kwargs())
+        for field, keys in self.lookups.items():
+            if field in form.fields:
+                original = form.fields[field]
+                form.fields[field] = PreloadedModelChoiceField(
+                    original.queryset.model, set(keys.values()), required=original.required, label=original.label
+                )
+        return form
+
+    def prepare(self, instance, data):
+        """Sets the fields the portal views fill in, returns a dict of errors when the row cannot be used"""
+
+        return None
+
+    def after_insert(self, start_id):
+        """Runs in the batch transaction after rows with ids above start_id were inserted"""
+
+    def validate(self, line, row):
+        data = self.row_to_data(row)
+        form = self.get_form(data)
+        if not form.is_valid():
+            self.report.error(line, form.errors)
+            return None
+        # Not form.save(commit=False): PropertyForm.save would look up the geocode cache for every row
+        instance = form.instance
+        errors = self.prepare(instance, data)
+        if errors:
+            self.report.error(line, errors)
+            return None
+        return instance
+
+    def insert(self, batch):
+        try:
+            with transaction.atomic():
+                start_id = last_id(self.model)
+                self.model.objects.bulk_create([instance for line, instance in batch])
+                self.after_insert(start_id)
+            self.report.imported += len(batch)
+        except IntegrityError:
+            # Find the offending rows by inserting the batch one row at a time
+            for line, instance in batch:
+                try:
+                    with transaction.atomic():
+                        start_id = last_id(self.model)
+                        instance.pk = None
+                        instance.save()
+                        self.after_insert(start_id)
+                    self.report.imported += 1
+                except IntegrityError as e:
+                    self.report.error(line, {'__all__': [str(e)]})
+
+    def run(self, rows):
+        # Line 1 is the header row
+        numbered = enumerate(rows, start=2)
+        while True:
+            chunk = list(itertools.islice(numbered, self.batch_size))
+            if not chunk:
+                break
+            batch = []
+            for line, row in chunk:
+                instance = self.validate(line, row)
+                if instance is not None:
+                    batch.append((line, instance))
+            if batch:
+                self.insert(batch)
+        OrganisationStats.objects.rebuild([self.organisation.pk])
+        PropertyOccupancy.objects.rebuild(Property.objects.filter(organisation_managing=self.organisation))
+        return self.report
+
+
+class LandLordImporter(ModelImporter):
+    model = LandLord
+    form_class = LandLordForm
+
+    def get_lookups(self):
+        return {'country': self.countries, 'nationality': self.countries}
+
+    def prepare(self, instance, data):
+        instance.managed_by = self.organisation
+
+    def after_insert(self, start_id):
+        SearchEntry.objects.add(LandLord.objects.filter(pk__gt=start_id, managed_by=self.organisation))
+
+
+class PropertyImporter(ModelImporter):
+    """Properties name their landlord by identification number"""
+    model = Property
+    form_class = PropertyForm
+
+    def get_lookups(self):
+        landlords = dict(LandLord.objects.filter(managed_by=self.organisation).values_list('identification', 'pk'))
+        return {'country': self.countries, 'land_lord': landlords}
+
+    def get_form_kwargs(self):
+        return {'organisation': self.organisation}
+
+    def prepare(self, instance, data):
+        instance.organisation_managing = self.organisation
+        country = self.country_table.by_id[instance.country_id]
+        # The raw address stands in until the geocode_worker resolves it
+        instance.geographic_location = address_query(instance.address, instance.city, country)
+
+    def after_insert(self, start_id):
+        inserted = Property.objects.filter(pk__gt=start_id, organisation_managing=self.organisation)
+        GeocodeJob.objects.bulk_create([GeocodeJob(property_id=pk) for pk in inserted.values_list('pk', flat=True)])
+        SearchEntry.objects.add(inserted)
+
+
+class TenantImporter(ModelImporter):
+    """Tenants name their property by title in a `property` column"""
+    model = Tenant
+    form_class = TenantForm
+
+    def get_lookups(self):
+        self.properties = dict(Property.objects.filter(organisation_managing=self.organisation)
+                               .values_list('title', 'pk'))
+        return {'nationality': self.countries}
+
+    def prepare(self, instance, data):
+        property_id = self.properties.get(data.get('property', ''))
+        if property_id is None:
+            return {'property': ['No property titled "%s".' % data.get('property', '')]}
+        instance.property_id = property_id
+
+    def after_insert(self, start_id):
+        SearchEntry.objects.add(Tenant.objects.filter(
+            pk__gt=start_id, property__organisation_managing=self.organisation).select_related('property'))
+
+
+class LeaseImporter(ModelImporter):
+    """
+        Leases name their tenant by identification number in a `tenant` column and the let space by
+        title in `premises` or `property_unit`; the lessor is the landlord of the tenant's property
+    """
+    model = Lease
+    form_class = LeaseForm
+
+    def get_lookups(self):
+        self.tenants = {
+            identification: (pk, property_id, land_lord_id)
+            for identification, pk, property_id, land_lord_id in Tenant.objects.filter(
+                property__organisation_managing=self.organisation
+            ).values_list('identification', 'pk', 'property_id', 'property__land_lord_id')
+        }
+        self.spaces = {
+            'premises': {(p, title): pk for pk, p, title in Premise.objects.filter(
+                property__organisation_managing=self.organisation).values_list('pk', 'property_id', 'premise_title')},
+            'property_unit': {(p, title): pk for pk, p, title in PropertyUnit.objects.filter(
+                property__organisation_managing=self.organisation).values_list('pk', 'property_id', 'unit_title')},
+        }
+        return {
+            'premises': {pk: pk for pk in self.spaces['premises'].values()},
+            'property_unit': {pk: pk for pk in self.spaces['property_unit'].values()},
+        }
+
+    def get_form_kwargs(self):
+        return {'property': None}
+
+    def row_to_data(self, row):
+        data = self.clean_row(row)
+        tenant = self.tenants.get(data.get('tenant', ''))
+        property_id = tenant[1] if tenant else None
+        for field, spaces in self.spaces.items():
+            if data.get(field):
+                data[field] = spaces.get((property_id, data[field]), 'unknown')
+        return data
+
+    def prepare(self, instance, data):
+        tenant = self.tenants.get(data.get('tenant', ''))
+        if tenant is None:
+            return {'tenant': ['No tenant with identification "%s".' % data.get('tenant', '')]}
+        instance.tenant_lessee_id, property_id, instance.owner_lessor_id = tenant
+        instance.organization_managing = self.organisation
+        instance.created_by_manager = self.manager
+
+    def after_insert(self, start_id):
+        # bulk_create skips the Lease signals, link the tenants and let spaces and fill the calendar here
+        inserted = Lease.objects.filter(pk__gt=start_id, organization_managing=self.organisation)
+        tenant_ids = dict(inserted.values_list('pk', 'tenant_lessee_id'))
+        Tenant.objects.bulk_update([Tenant(pk=tenant_id, lease_id=pk) for pk, tenant_id in tenant_ids.items()],
+                                   ['lease'])
+        retire_detail_pages(Tenant, tenant_ids.values())
+        # Spaces of ended or inactive leases stay vacant; saving the changed ones keeps stats and occupancy
+        refresh_vacancy(PropertyUnit.objects.filter(pk__in=inserted.values('property_unit')),
+                        Premise.objects.filter(pk__in=inserted.values('premises')))
+        LeaseEvent.objects.rebuild(inserted)
+
+
+IMPORTERS = {
+    'landlords': LandLordImporter,
+    'properties': PropertyImporter,
+    'tenants': TenantImporter,
+    'leases': LeaseImporter,
+}
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+# Environment of each benchmark_portal run, see the Database section of settings.py
+MODES = [
+    ('per_request', {'DATABASE_CONN_MAX_AGE': '0', 'DATABASE_POOL': ''}),
+    ('persistent', {'DATABASE_CONN_MAX_AGE': '600', 'DATABASE_POOL': ''}),
+    ('pooled', {'DATABASE_CONN_MAX_AGE': '0', 'DATABASE_POOL': 'psycopg2'}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Runs benchmark_portal with a new connection per request, persistent connections and a connection ' \
+           'pool, and reports the p50/p95 latency of each page under each as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Manager to sign in as, defaults to the one with the most properties')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per page')
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def run_benchmark(self, mode_environment, options):
+        """benchmark_portal's report, run in a new process so the database settings are read afresh"""
+
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_portal',
+                   '--repeat', str(options['repeat']), '--output', path]
+        if options['email']:
+            command += ['--email', options['email']]
+        try:
+            subprocess.run(command, env=dict(os.environ, **mode_environment), check=True, stdout=subprocess.DEVNULL)
+            with open(path) as f:
+                return json.load(f)
+        finally:
+            os.remove(path)
+
+    def handle(self, *args, **options):
+        # The pool is a PostgreSQL backend
+        modes = [(name, environment) for name, environment in MODES
+                 if connection.vendor == 'postgresql' or not environment['DATABASE_POOL']]
+        report = {'database': connection.vendor, 'repeat': options['repeat'], 'modes': [name for name, _ in modes],
+                  'pages': {}}
+        for name, environment in modes:
+            for page, timings in self.run_benchmark(environment, options)['pages'].items():
+                report['pages'].setdefault(page, {'url': timings['url']})[name] = {
+                    'p50_ms': timings['p50_ms'], 'p95_ms': timings['p95_ms']}
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
@@ -0,0 +1,140 @@
+import datetime
+import json
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from manager import urls as manager_urls
+from manager.models import PropertyManager, LandLord, Property, PropertyUnit, Premise, Tenant, Lease
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[max(int(math.ceil(fraction * len(ordered))) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = 'Requests every portal page as a manager and reports p50/p95 latency and query counts as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='Manager to sign in as, defaults to the one with the most properties')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per page')
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def get_manager(self, email):
+        managers = PropertyManager.objects.select_related('user', 'organisation')
+        if email:
+            return managers.get(user__email=email)
+        manager = managers.annotate(properties=Count('organisation__property')).order_by('-properties').first()
+        if manager is None:
+            raise CommandError('No property managers found, run seed_benchmark first')
+        return manager
+
+    def get_urls(self, organisation):
+        """One URL per GET route in manager/urls.py, filled in with the organisation's busiest rows"""
+
+        lease = Lease.objects.filter(organization_managing=organisation).select_related('tenant_lessee').first()
+        tenant = lease.tenant_lessee if lease else Tenant.objects.filter(
+            property__organisation_managing=organisation).first()
+        property_obj = Property.objects.filter(organisation_managing=organisation) \
+            .annotate(tenants=Count('tenant')).order_by('-tenants').first()
+        landlord = LandLord.objects.filter(managed_by=organisation).first()
+        unit = PropertyUnit.objects.filter(property=property_obj).first()
+        premise = Premise.objects.filter(property=property_obj).first()
+        if None in (lease, tenant, property_obj, landlord, unit, premise):
+            raise CommandError('The organisation needs at least one of every record, run seed_benchmark first')
+
+        prop = tenant.property_id
+        kwargs = {
+            'autocomplete': {'kind': 'landlords'},
+            'export': {'kind': 'rent-roll'},
+            'landlord_detail': {'pk': landlord.pk},
+            'landlord_update': {'pk': landlord.pk},
+            'property_detail': {'pk': property_obj.pk},
+            'property_update': {'pk': property_obj.pk},
+            'property_units': {'prop': property_obj.pk},
+            'property_units_new': {'prop': property_obj.pk},
+            'property_units_detail': {'prop': property_obj.pk, 'pk': unit.pk},
+            'property_units_update': {'prop': property_obj.pk, 'pk': unit.pk},
+            'property_premises': {'prop': property_obj.pk},
+            'property_premises_new': {'prop': property_obj.pk},
+            'property_premises_detail': {'prop': property_obj.pk, 'pk': premise.pk},
+            'property_premises_update': {'prop': property_obj.pk, 'pk': premise.pk},
+            'property_tenants': {'prop': property_obj.pk},
+            'property_tenant_new': {'prop': property_obj.pk},
+            'property_tenant_detail': {'prop': prop, 'pk': tenant.pk},
+            'property_tenant_update': {'prop': prop, 'pk': tenant.pk},
+            'tenants_lease_new': {'prop': prop, 'ten': tenant.pk},
+            'tenant_lease_detail': {'prop': prop, 'ten': tenant.pk, 'pk': lease.pk},
+            'tenant_lease_update': {'prop': prop, 'ten': tenant.pk, 'pk': lease.pk},
+        }
+        today = timezone.localdate()
+        query_strings = {
+            'search': '?q=tenant',
+            'search_json': '?q=tenant',
+            'autocomplete': '?q=landlord',
+            'properties_nearby': '?lat=-17.83&lng=31.05&radius=50',
+            'lease_events': '?start=%s&end=%s' % (today, today + datetime.timedelta(days=42)),
+        }
+        urls = []
+        for pattern in manager_urls.urlpatterns:
+            name = pattern.name
+            url = reverse('%s:%s' % (manager_urls.app_name, name), kwargs=kwargs.get(name))
+            urls.append((name, url + query_strings.get(name, '')))
+        return urls
+
+    def measure(self, client, url, repeat):
+        """
+            Times `repeat` requests of url after a warm-up one. The test client disconnects
+            close_old_connections from request_finished, so it is called after each request as the WSGI handler
+            would: with CONN_MAX_AGE 0 the connection is closed, or returned to the pool, and the next request
+            opens or borrows it again.
+        """
+
+        client.get(url)
+        close_old_connections()
+        timings = []
+        queries = 0
+        status = None
+        for _ in range(repeat):
+            # Started before capturing, which connects: opening the connection is part of the request
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as captured:
+                response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+            close_old_connections()
+            queries = len(captured.captured_queries)
+            status = response.status_code
+        return {
+            'url': url,
+            'status': status,
+            'p50_ms': round(percentile(timings, 0.50), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': queries,
+        }
+
+    def handle(self, *args, **options):
+        manager = self.get_manager(options['email'])
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(manager.user)
+
+        report = {
+            'organisation': str(manager.organisation),
+            'manager': manager.user.email,
+            'repeat': options['repeat'],
+            'database': connection.vendor,
+            'pages': {name: self.measure(client, url, options['repeat'])
+                      for name, url in self.get_urls(manager.organisation)},
+        }
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
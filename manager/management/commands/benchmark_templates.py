@@ -0,0 +1,67 @@
+import json
+import time
+
+from django.conf import settings
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve
+
+from manager.management.commands import benchmark_portal
+from manager.management.commands.benchmark_portal import percentile
+
+PAGES = ['portal', 'landlords', 'properties', 'tenants', 'vacancy_report', 'lease_calendar', 'search',
+         'landlord_detail', 'property_detail', 'property_tenant_detail', 'tenant_lease_detail', 'landlord_update',
+         'tenant_lease_update']
+
+DUMMY_CACHE = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+LOCMEM_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-templates'}
+
+
+def template_settings(cached):
+    """TEMPLATES and CACHES with compiled template and fragment caching on or off"""
+
+    loaders = settings.TEMPLATE_LOADERS
+    templates = [dict(settings.TEMPLATES[0], OPTIONS=dict(
+        settings.TEMPLATES[0]['OPTIONS'],
+        loaders=[('django.template.loaders.cached.Loader', loaders)] if cached else loaders
+    ))]
+    # Detail pages are not served from the page cache, so every request renders its template
+    caches = dict(settings.CACHES, default=DUMMY_CACHE, templates=LOCMEM_CACHE if cached else DUMMY_CACHE)
+    return {'TEMPLATES': templates, 'CACHES': caches}
+
+
+class Command(benchmark_portal.Command):
+    help = 'Reports the p50/p95 template render time of portal pages without and with template caching, as JSON'
+
+    def render_timings(self, manager, url, repeat):
+        match = resolve(url.split('?')[0])
+        factory = RequestFactory(HTTP_HOST='127.0.0.1')
+        timings = []
+        for i in range(repeat + 1):
+            request = factory.get(url)
+            request.user, request.manager, request.organisation = manager.user, manager, manager.organisation
+            response = match.func(request, *match.args, **match.kwargs)
+            started = time.perf_counter()
+            response.render()
+            # The first render fills the caches being measured
+            if i:
+                timings.append((time.perf_counter() - started) * 1000)
+        return {'p50_ms': round(percentile(timings, 0.50), 2), 'p95_ms': round(percentile(timings, 0.95), 2)}
+
+    def handle(self, *args, **options):
+        manager = self.get_manager(options['email'])
+        urls = [(name, url) for name, url in self.get_urls(manager.organisation) if name in PAGES]
+        report = {'organisation': str(manager.organisation), 'repeat': options['repeat'], 'pages': {}}
+        for label, cached in (('uncached', False), ('cached', True)):
+            with override_settings(**template_settings(cached)):
+                for name, url in urls:
+                    report['pages'].setdefault(name, {'url': url})[label] = self.render_timings(
+                        manager, url, options['repeat'])
+        for page in report['pages'].values():
+            page['saved_ms'] = round(page['uncached']['p50_ms'] - page['cached']['p50_ms'], 2)
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.billing import CHUNK_SIZE, bill, parse_period
+from manager.models import Organisation
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Raises a month\'s rent, rates, recovery and late interest charges for every active lease, safe to rerun'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisations', nargs='*', type=int, help='Organisation ids, all when omitted')
+        parser.add_argument('--period', help='Month to bill as YYYY-MM, the current month by default')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Leases billed per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            period = parse_period(options['period']) if options['period'] else timezone.localdate().replace(day=1)
+        except ValueError:
+            raise CommandError('Give the period as YYYY-MM')
+        organisations = Organisation.objects.order_by('pk')
+        if options['organisations']:
+            organisations = organisations.filter(pk__in=options['organisations'])
+
+        for organisation in organisations:
+            started = time.perf_counter()
+            run = bill(organisation, period, options['chunk_size'])
+            self.stdout.write('%s: %s charges on %s leases totalling %s in %.1fs' % (
+                run, run.charges, run.leases, run.total, time.perf_counter() - started))
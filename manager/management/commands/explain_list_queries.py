@@ -0,0 +1,100 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from manager.models import Organisation, LandLord, Property, PropertyUnit, Premise, Tenant, Lease
+
+LIST_INDEXES = [
+    'landlord_org_active_idx',
+    'property_org_active_idx',
+    'unit_property_active_idx',
+    'premise_property_active_idx',
+    'tenant_property_active_idx',
+    'lease_org_active_idx',
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Prints EXPLAIN plans and timings of the portal list queries with and without the list indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organisation', type=int, help='Organisation to query, defaults to the largest')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query when timing')
+        parser.add_argument('--drop-indexes', action='store_true',
+                            help='Time the queries without the list indexes by dropping them in a rolled back '
+                                 'transaction. This locks the tables, so it is only allowed with DEBUG on, '
+                                 'against a seeded development or benchmark database.')
+
+    def list_queries(self, organisation):
+        property_obj = Property.objects.filter(organisation_managing=organisation).order_by('id').first()
+        property_id = property_obj.pk if property_obj else 0
+        return [
+            ('LandLordListView', LandLord.objects.filter(managed_by=organisation, is_active=True)),
+            ('PropertyListView', Property.objects.filter(organisation_managing=organisation, is_active=True)),
+            ('PropertyUnitListView', PropertyUnit.objects.filter(property_id=property_id, is_active=True)),
+            ('PropertyPremiseListView', Premise.objects.filter(property_id=property_id, is_active=True)),
+            ('TenantListView', Tenant.objects.filter(property_id=property_id, is_active=True)),
+            ('AllTenantsListView', Tenant.objects.filter(property__organisation_managing=organisation,
+                                                         is_active=True)),
+            ('Active leases', Lease.objects.filter(organization_managing=organisation, is_active=True)),
+        ]
+
+    def report(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in queries:
+            page = queryset.order_by('id')[:10]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(page)
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            self.stdout.write('%s (%.2f ms)' % (name, elapsed))
+            self.stdout.write('    ' + page.explain().replace('\n', '\n    '))
+
+    def handle(self, *args, **options):
+        if options['organisation']:
+            organisation = Organisation.objects.get(pk=options['organisation'])
+        else:
+            organisation = Organisation.objects.annotate(properties=Count('property')).order_by('-properties').first()
+        queries = self.list_queries(organisation)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.report('With list indexes', queries, options['repeat'])
+
+        if options['drop_indexes']:
+            if not settings.DEBUG:
+                raise CommandError('--drop-indexes locks the list tables, it needs DEBUG on')
+            self.report_without(queries, options['repeat'], self.drop_indexes)
+        elif connection.vendor == 'postgresql':
+            self.report_without(queries, options['repeat'], self.disable_index_scans)
+        else:
+            self.stdout.write('Run with --drop-indexes against a development database to compare plans without '
+                              'the list indexes')
+
+    def drop_indexes(self, cursor):
+        for name in LIST_INDEXES:
+            cursor.execute('DROP INDEX %s' % connection.ops.quote_name(name))
+
+    def disable_index_scans(self, cursor):
+        # Planner settings for this transaction only: no locks are taken, but every index is ignored, not just
+        # the list indexes
+        for setting in ('enable_indexscan', 'enable_indexonlyscan', 'enable_bitmapscan'):
+            cursor.execute('SET LOCAL %s = off' % setting)
+
+    def report_without(self, queries, repeat, prepare):
+        """Reports the queries inside a transaction prepared by `prepare` and always rolled back"""
+
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                prepare(cursor)
+                self.report('Without list indexes', queries, repeat)
+                raise Rollback
+        except Rollback:
+            pass
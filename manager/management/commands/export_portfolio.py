@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.exporting import CHUNK_SIZE, EXPORTS, export_csv
+from manager.models import Organisation
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Writes an organisation\'s properties, tenants, leases or rent roll as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS), help='What to export')
+        parser.add_argument('organisation', type=int, help='Organisation id')
+        parser.add_argument('--output', help='File to write, standard output when omitted')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        try:
+            organisation = Organisation.objects.get(pk=options['organisation'])
+        except Organisation.DoesNotExist:
+            raise CommandError('No organisation with id %s' % options['organisation'])
+
+        lines = export_csv(options['kind'], organisation, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                f.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from manager.geocoding import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Processes queued property geocoding jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the jobs that are due and exit')
+        parser.add_argument('--batch', type=int, default=50, help='Jobs claimed per batch')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = run_pending(options['batch'])
+            if processed:
+                self.stdout.write('Processed %s geocode job(s)' % processed)
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
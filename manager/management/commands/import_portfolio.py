@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.importing import IMPORTERS, ImportReport, read_rows
+from manager.models import PropertyManager
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Imports landlords, properties, tenants or leases for a manager\'s organisation from a .csv or .xlsx file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS), help='What the file contains')
+        parser.add_argument('path', help='.csv or .xlsx file with a header row of form field names')
+        parser.add_argument('--manager', required=True, help='Email of the manager the rows are imported for')
+        parser.add_argument('--errors', help='Write rejected rows (line, field, error) to this CSV file')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and inserted per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            manager = PropertyManager.objects.select_related('user', 'organisation') \
+                .get(user__email=options['manager'])
+        except PropertyManager.DoesNotExist:
+            raise CommandError('No property manager with email %s' % options['manager'])
+
+        started = time.perf_counter()
+        report = ImportReport(options['errors'])
+        try:
+            importer = IMPORTERS[options['kind']](manager, batch_size=options['batch_size'], report=report)
+            importer.run(read_rows(options['path']))
+        except (ImportError, OSError) as e:
+            raise CommandError(e)
+        finally:
+            report.close()
+
+        self.stdout.write(self.style.SUCCESS('Imported %s %s in %.1fs' % (
+            report.imported, options['kind'], time.perf_counter() - started)))
+        if report.failed:
+            self.stdout.write(self.style.WARNING('%s row(s) rejected%s' % (
+                report.failed, ', see %s' % options['errors'] if options['errors'] else '')))
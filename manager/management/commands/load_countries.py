@@ -0,0 +1,30 @@
+import csv
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from manager.models import Country
+
+
+def read_countries(path):
+    """(id, code, name) rows of a headerless "id","code","name" CSV file"""
+
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(int(pk), code, name.strip()) for pk, code, name in csv.reader(f) if pk.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Creates or updates the countries listed in countries.csv, safe to run again'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=os.path.join(settings.BASE_DIR, 'countries.csv'),
+                            help='"id","code","name" CSV file, countries.csv by default')
+
+    def handle(self, *args, **options):
+        try:
+            rows = read_countries(options['path'])
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+        created, updated = Country.objects.upsert(rows)
+        self.stdout.write(self.style.SUCCESS('%s countries: %s created, %s updated' % (len(rows), created, updated)))
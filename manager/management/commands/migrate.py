@@ -0,0 +1,7 @@
+from django.core.management.commands import migrate
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+
+
+class Command(NoStatementTimeoutMixin, migrate.Command):
+    """Django's migrate, without the statement timeout: building indexes on large tables takes a while"""
@@ -0,0 +1,44 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager import statements
+from manager.billing import parse_period
+from manager.models import Organisation, ZERO
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Writes a month\'s owner statement for every active landlord, spread over a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisations', nargs='*', type=int, help='Organisation ids, all when omitted')
+        parser.add_argument('--period', help='Month as YYYY-MM, the previous month by default')
+        parser.add_argument('--format', choices=statements.FORMATS, default='html')
+        parser.add_argument('--output-dir', default=settings.OWNER_STATEMENT_DIR)
+        parser.add_argument('--workers', type=int, help='Worker processes, one per CPU by default')
+        parser.add_argument('--chunk-size', type=int, default=statements.CHUNK_SIZE,
+                            help='Landlords handed to a worker at a time')
+
+    def handle(self, *args, **options):
+        try:
+            period = parse_period(options['period']) if options['period'] else \
+                (timezone.localdate().replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
+        except ValueError:
+            raise CommandError('Give the period as YYYY-MM')
+        if options['format'] == 'pdf' and statements.weasyprint is None:
+            raise CommandError('PDF statements need the weasyprint package')
+        organisations = Organisation.objects.order_by('pk')
+        if options['organisations']:
+            organisations = organisations.filter(pk__in=options['organisations'])
+
+        for organisation in organisations:
+            started = time.perf_counter()
+            rows = statements.generate(organisation, period, options['output_dir'], options['format'],
+                                       options['workers'], options['chunk_size'])
+            self.stdout.write('%s %s: %s statements paying out %s in %.1fs' % (
+                organisation, period.strftime('%Y-%m'), len(rows), sum((net for pk, net, path in rows), ZERO),
+                time.perf_counter() - started))
@@ -0,0 +1,38 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.models import Organisation
+from manager.projection import CHUNK_SIZE, Projection
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Projects the monthly rent and recoveries of an organisation\'s active leases as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisation', type=int, help='Organisation id')
+        parser.add_argument('--years', type=int, default=10, help='Projection horizon')
+        parser.add_argument('--annual', action='store_true', help='One row per year instead of per month')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Leases projected per pass')
+
+    def handle(self, *args, **options):
+        try:
+            organisation = Organisation.objects.get(pk=options['organisation'])
+        except Organisation.DoesNotExist:
+            raise CommandError('No organisation with id %s' % options['organisation'])
+
+        started = time.perf_counter()
+        projection = Projection(organisation, years=options['years']).run(options['chunk_size'])
+        elapsed = time.perf_counter() - started
+
+        writer = csv.writer(self.stdout)
+        if options['annual']:
+            writer.writerow(['year from', 'rent', 'recoveries', 'total'])
+            writer.writerows(projection.annual())
+        else:
+            writer.writerow(['month', 'rent', 'recoveries'])
+            writer.writerows(projection.monthly())
+        self.stderr.write('Projected %s leases over %s months in %.3fs' % (
+            projection.lease_count, projection.months, elapsed))
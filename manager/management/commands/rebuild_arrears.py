@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.models import ArrearsAgeing
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Rebuilds the arrears ageing of every lease as of today, run nightly so charges move between buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisations', nargs='*', type=int, help='Organisation ids, all when omitted')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Leases aged per query')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        in_arrears = ArrearsAgeing.objects.rebuild(options['organisations'] or None,
+                                                   chunk_size=options['chunk_size'])
+        self.stdout.write('%s leases in arrears, aged in %.1fs' % (in_arrears, time.perf_counter() - started))
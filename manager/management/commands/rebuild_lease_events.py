@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.models import Lease, LeaseEvent
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Recomputes the lease calendar of every organisation (or the given ones), run nightly to extend ' \
+           'annual reviews of open-ended leases over the horizon'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisations', nargs='*', type=int, help='Organisation ids, all when omitted')
+
+    def handle(self, *args, **options):
+        leases = Lease.objects.all()
+        if options['organisations']:
+            leases = leases.filter(organization_managing__in=options['organisations'])
+        rebuilt = LeaseEvent.objects.rebuild(leases)
+        self.stdout.write('Rebuilt calendar events for %s lease(s)' % rebuilt)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.models import OrganisationStats
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Recounts the dashboard statistics of every organisation (or the given ones) from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisations', nargs='*', type=int, help='Organisation ids, all when omitted')
+
+    def handle(self, *args, **options):
+        rebuilt = OrganisationStats.objects.rebuild(options['organisations'] or None)
+        self.stdout.write('Rebuilt statistics for %s organisation(s)' % rebuilt)
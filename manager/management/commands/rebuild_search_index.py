@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.models import SearchEntry
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Re-indexes the landlords, properties and tenants of every organisation (or the given ones) for search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisations', nargs='*', type=int, help='Organisation ids, all when omitted')
+
+    def handle(self, *args, **options):
+        indexed = SearchEntry.objects.rebuild(options['organisations'] or None)
+        self.stdout.write('Indexed %s record(s)' % indexed)
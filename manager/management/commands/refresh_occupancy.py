@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.models import PropertyOccupancy, refresh_vacancy
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Marks units and premises vacant once their lease has ended, run nightly; ' \
+           '--rebuild also recounts every property\'s occupancy from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recount occupancy of every property')
+
+    def handle(self, *args, **options):
+        changed = refresh_vacancy()
+        self.stdout.write('Updated vacancy of %s unit(s) and premise(s)' % changed)
+        if options['rebuild']:
+            rebuilt = PropertyOccupancy.objects.rebuild()
+            self.stdout.write('Rebuilt occupancy for %s propert(ies)' % rebuilt)
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ekpm.db.timeouts import NoStatementTimeoutMixin
+from manager.seeding import seed
+
+
+class Command(NoStatementTimeoutMixin, BaseCommand):
+    help = 'Generates organisations with realistic portfolios for load testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisations', type=int, help='Number of organisations to create')
+        parser.add_argument('--landlords', type=int, default=50, help='Landlords per organisation')
+        parser.add_argument('--properties-per-landlord', type=int, default=2)
+        parser.add_argument('--units-per-property', type=int, default=4)
+        parser.add_argument('--premises-per-property', type=int, default=6)
+        parser.add_argument('--occupancy', type=float, default=0.8, help='Share of units and premises let')
+        parser.add_argument('--batch-size', type=int, help='Rows per INSERT, defaults to the database maximum')
+        parser.add_argument('--password', default='benchmark', help='Password of the generated managers')
+        parser.add_argument('--seed', type=int, help='Random seed for a reproducible dataset')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        organisations = seed(
+            options['organisations'], password=options['password'], seed=options['seed'],
+            landlords=options['landlords'], properties_per_landlord=options['properties_per_landlord'],
+            units_per_property=options['units_per_property'], premises_per_property=options['premises_per_property'],
+            occupancy=options['occupancy'], batch_size=options['batch_size'],
+        )
+        for organisation in organisations:
+            self.stdout.write('%s: manager %s' % (organisation, organisation.propertymanager_set.get().user.email))
+        self.stdout.write(self.style.SUCCESS('Seeded %s organisation(s) in %.1fs' % (
+            len(organisations), time.perf_counter() - started)))
@@ -0,0 +1,18 @@
+from django.utils.functional import SimpleLazyObject
+
+from manager.models import PropertyManager
+
+
+class PropertyManagerMiddleware(object):
+    """
+        Attaches the signed in user's PropertyManager and Organisation to the request as
+        request.manager and request.organisation. Both are resolved lazily, at most once per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.manager = SimpleLazyObject(lambda: PropertyManager.objects.for_user(request.user))
+        request.organisation = SimpleLazyObject(lambda: request.manager.organisation)
+        return self.get_response(request)
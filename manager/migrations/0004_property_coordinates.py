@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:03
+
+from django.db import migrations, models
+
+
+def queue_existing_properties(apps, schema_editor):
+    """Existing properties only have a text location, geocode them again to fill in coordinates"""
+    Property = apps.get_model('manager', 'Property')
+    GeocodeJob = apps.get_model('manager', 'GeocodeJob')
+    GeocodeJob.objects.bulk_create(
+        [GeocodeJob(property_id=pk) for pk in Property.objects.values_list('pk', flat=True)],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0003_geocodecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['organisation_managing', 'latitude', 'longitude'], name='manager_pro_organis_94311d_idx'),
+        ),
+        migrations.RunPython(queue_existing_properties, migrations.RunPython.noop),
+    ]
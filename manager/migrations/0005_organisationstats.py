@@ -0,0 +1,30 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0004_property_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganisationStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenants', models.IntegerField(default=0)),
+                ('landlords', models.IntegerField(default=0)),
+                ('properties', models.IntegerField(default=0)),
+                ('premises', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('vacancies', models.IntegerField(default=0)),
+                ('active_leases', models.IntegerField(default=0)),
+                ('monthly_rent', models.DecimalField(decimal_places=2, default=0.0, max_digits=17)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('organisation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='manager.Organisation')),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0005_organisationstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='landlord',
+            index=models.Index(condition=models.Q(is_active=True), fields=['managed_by', 'id'], name='landlord_org_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lease',
+            index=models.Index(condition=models.Q(is_active=True), fields=['organization_managing', 'id'], name='lease_org_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='premise',
+            index=models.Index(condition=models.Q(is_active=True), fields=['property', 'id'], name='premise_property_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(is_active=True), fields=['organisation_managing', 'id'], name='property_org_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyunit',
+            index=models.Index(condition=models.Q(is_active=True), fields=['property', 'id'], name='unit_property_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(condition=models.Q(is_active=True), fields=['property', 'id'], name='tenant_property_active_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:17
+
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of manager.models.anniversary and lease_event_dates as they stood when this migration was
+# written, so later changes to the models do not change what it builds
+HORIZON_YEARS = 10
+
+
+def anniversary(date, years):
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:
+        return date.replace(year=date.year + years, day=28)
+
+
+def lease_event_dates(lease, until):
+    if not lease.is_active:
+        return []
+    events = [('occupation', lease.occupation_date), ('review', lease.rent_review_date)]
+    if lease.lease_ends and not lease.lease_indefinite_thereafter:
+        events.append(('expiry', lease.lease_ends))
+        until = min(until, lease.lease_ends)
+    years = 0
+    while anniversary(lease.annual_rent_review_date, years) <= until:
+        events.append(('annual_review', anniversary(lease.annual_rent_review_date, years)))
+        years += 1
+    return events
+
+
+def build_existing_events(apps, schema_editor):
+    """Fills the calendar from the leases already in the database"""
+    Lease = apps.get_model('manager', 'Lease')
+    LeaseEvent = apps.get_model('manager', 'LeaseEvent')
+    until = anniversary(datetime.date.today(), HORIZON_YEARS)
+    for lease in Lease.objects.iterator(chunk_size=2000):
+        LeaseEvent.objects.bulk_create([
+            LeaseEvent(lease_id=lease.pk, organisation_id=lease.organization_managing_id, kind=kind, date=date)
+            for kind, date in lease_event_dates(lease, until)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0006_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaseEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('expiry', 'Lease Expiry'), ('review', 'Rent Review'), ('annual_review', 'Annual Rent Review'), ('occupation', 'Occupation')], max_length=20)),
+                ('date', models.DateField()),
+                ('lease', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='manager.Lease')),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Organisation')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leaseevent',
+            index=models.Index(fields=['organisation', 'date'], name='manager_lea_organis_410696_idx'),
+        ),
+        migrations.RunPython(build_existing_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def derive_vacancy(apps, schema_editor):
+    """is_vacant used to be set by hand, derive it from the leases once and let the stats be recounted"""
+    today = timezone.localdate()
+    occupied = models.Q(lease__is_active=True) & (
+        models.Q(lease__lease_ends__isnull=True) | models.Q(lease__lease_ends__gte=today) |
+        models.Q(lease__lease_indefinite_thereafter=True)
+    )
+    for name in ('PropertyUnit', 'Premise'):
+        model = apps.get_model('manager', name)
+        let = model.objects.filter(occupied).values('pk')
+        model.objects.filter(pk__in=let).update(is_vacant=False)
+        model.objects.exclude(pk__in=let).update(is_vacant=True)
+    apps.get_model('manager', 'OrganisationStats').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0007_leaseevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyOccupancy',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('units', models.IntegerField(default=0)),
+                ('occupied_units', models.IntegerField(default=0)),
+                ('premises', models.IntegerField(default=0)),
+                ('occupied_premises', models.IntegerField(default=0)),
+                ('total_area', models.DecimalField(decimal_places=3, default=0.0, max_digits=17)),
+                ('occupied_area', models.DecimalField(decimal_places=3, default=0.0, max_digits=17)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='manager.Property')),
+            ],
+        ),
+        migrations.RunPython(derive_vacancy, migrations.RunPython.noop),
+    ]
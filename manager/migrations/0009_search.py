@@ -0,0 +1,59 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_full_text_index(apps, schema_editor):
+    """On PostgreSQL search entries are matched through a GIN index on their tsvector"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX searchentry_document_fts_idx ON manager_searchentry "
+            "USING GIN (to_tsvector('simple', document))"
+        )
+
+
+def drop_full_text_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS searchentry_document_fts_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0008_propertyoccupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('landlord', 'LandLord'), ('property', 'Property'), ('tenant', 'Tenant')], max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('detail', models.CharField(blank=True, max_length=255)),
+                ('url', models.CharField(max_length=255)),
+                ('document', models.TextField()),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Organisation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='manager.SearchEntry')),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Organisation')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchtrigram',
+            index=models.Index(fields=['organisation', 'trigram', 'entry'], name='manager_sea_organis_355b13_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchentry',
+            unique_together={('kind', 'object_id')},
+        ),
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+    ]
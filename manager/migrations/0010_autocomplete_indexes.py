@@ -0,0 +1,52 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:32
+
+from django.db import migrations, models
+
+PREFIX_INDEXES = [
+    ('country_name_prefix_idx', 'manager_country', 'UPPER(name::text) text_pattern_ops'),
+    ('landlord_org_name_prefix_idx', 'manager_landlord', 'managed_by_id, UPPER(name::text) text_pattern_ops'),
+    ('premise_property_title_prefix_idx', 'manager_premise',
+     'property_id, UPPER(premise_title::text) text_pattern_ops'),
+    ('unit_property_title_prefix_idx', 'manager_propertyunit',
+     'property_id, UPPER(unit_title::text) text_pattern_ops'),
+]
+
+
+def create_prefix_indexes(apps, schema_editor):
+    """istartswith compiles to UPPER(column) LIKE 'TERM%' on PostgreSQL, which only these indexes can serve"""
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, table, columns in PREFIX_INDEXES:
+            schema_editor.execute('CREATE INDEX %s ON %s (%s)' % (name, table, columns))
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, table, columns in PREFIX_INDEXES:
+            schema_editor.execute('DROP INDEX IF EXISTS %s' % name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0009_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['name'], name='country_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='landlord',
+            index=models.Index(fields=['managed_by', 'name'], name='landlord_org_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='premise',
+            index=models.Index(fields=['property', 'premise_title'], name='premise_property_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyunit',
+            index=models.Index(fields=['property', 'unit_title'], name='unit_property_title_idx'),
+        ),
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
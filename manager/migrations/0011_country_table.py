@@ -0,0 +1,40 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:33
+
+from django.db import migrations
+import django.db.models.deletion
+import manager.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0010_autocomplete_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='landlord',
+            name='country',
+            field=manager.models.CountryForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='country', to='manager.Country'),
+        ),
+        migrations.AlterField(
+            model_name='landlord',
+            name='nationality',
+            field=manager.models.CountryForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nationality', to='manager.Country'),
+        ),
+        migrations.AlterField(
+            model_name='organisation',
+            name='country',
+            field=manager.models.CountryForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Country'),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='country',
+            field=manager.models.CountryForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Country'),
+        ),
+        migrations.AlterField(
+            model_name='tenant',
+            name='nationality',
+            field=manager.models.CountryForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Country'),
+        ),
+    ]
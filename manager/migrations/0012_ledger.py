@@ -0,0 +1,71 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0011_country_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done')], default='running', max_length=20)),
+                ('leases', models.IntegerField(default=0)),
+                ('charges', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('started', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Organisation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('rent', 'Rent'), ('rates', 'Rates'), ('recovery', 'Recoveries'), ('interest', 'Late Payment Interest'), ('payment', 'Payment')], max_length=20)),
+                ('period', models.DateField(blank=True, null=True)),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('reference', models.CharField(blank=True, max_length=255)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('billing_run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='manager.BillingRun')),
+                ('lease', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger', to='manager.Lease')),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Organisation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Allocation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('charge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='manager.LedgerEntry')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocated_to', to='manager.LedgerEntry')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['lease', 'id', 'balance'], name='ledger_lease_balance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['organisation', 'date'], name='ledger_org_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerentry',
+            constraint=models.UniqueConstraint(condition=models.Q(period__isnull=False), fields=('lease', 'kind', 'period'), name='ledger_charge_once_per_period'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='billingrun',
+            unique_together={('organisation', 'period')},
+        ),
+    ]
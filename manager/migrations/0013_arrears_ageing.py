@@ -0,0 +1,36 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0012_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArrearsAgeing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('days_30', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('days_60', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('days_90', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('days_120', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('as_of', models.DateField()),
+                ('landlord', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.LandLord')),
+                ('lease', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='arrears', to='manager.Lease')),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Organisation')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Property')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manager.Tenant')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='arrearsageing',
+            index=models.Index(fields=['organisation', 'property'], name='arrears_org_property_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-17 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0013_arrears_ageing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landlord',
+            name='management_fee_percentage',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=5),
+        ),
+    ]
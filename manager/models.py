@@ -1,30 +1,152 @@
+import collections
+import datetime
+import math
+import time
+import uuid
+from decimal import Decimal
+from types import MappingProxyType
+
 from django.conf import settings
-from django.db import models
+from django.db import connections, models, transaction
 from django.contrib.auth.models import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
 from django.contrib.auth.models import BaseUserManager
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.http import request
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.dispatch import receiver
 
+from manager.search import normalise, trigrams, trigram_threshold, tsquery
+
+
+ZERO = Decimal('0.00')
+
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great circle distance between two points in kilometres"""
+
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+COUNTRY_TABLE_VERSION_KEY = 'country_table:version'
+
+CountryTable = collections.namedtuple('CountryTable', ['version', 'countries', 'by_id', 'by_code'])
+
+
+class CountryManager(models.Manager):
+    """
+        Countries are static reference data, so lookups by id or code are served from a read-only table held
+        by each process. Saving or deleting a country drops it; other processes notice through a version kept
+        in the default cache, which is checked at most every COUNTRY_TABLE_CHECK_SECONDS. That cache must be
+        shared by all processes, which settings.py enforces outside DEBUG.
+    """
+    _table = None
+    _checked = 0
+
+    def table(self):
+        """The CountryTable, countries sorted by name; its Country instances are shared, do not modify them"""
+
+        now = time.monotonic()
+        table = CountryManager._table
+        if table is not None and now - CountryManager._checked >= settings.COUNTRY_TABLE_CHECK_SECONDS:
+            CountryManager._checked = now
+            if cache.get(COUNTRY_TABLE_VERSION_KEY) != table.version:
+                table = None
+        if table is None:
+            # Read the version first so a change made while loading forces another load
+            version = cache.get_or_set(COUNTRY_TABLE_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+            countries = tuple(self.order_by('name', 'id'))
+            table = CountryManager._table = CountryTable(
+                version, countries, MappingProxyType({country.pk: country for country in countries}),
+                MappingProxyType({country.code.upper(): country for country in countries})
+            )
+            CountryManager._checked = now
+        return table
+
+    def invalidate(self):
+        CountryManager._table = None
+        cache.set(COUNTRY_TABLE_VERSION_KEY, uuid.uuid4().hex, None)
+
+    def upsert(self, rows):
+        """
+            Creates or updates countries from (id, code, name) rows, matching existing countries by code.
+            New countries keep the row's id unless it is taken. Returns (created, updated).
+        """
+
+        with transaction.atomic(using=self.db):
+            existing = {country.code.upper(): country for country in self.all()}
+            taken = {country.pk for country in existing.values()}
+            created, updated = [], []
+            for pk, code, name in rows:
+                code = code.strip().upper()
+                country = existing.get(code)
+                if country is None:
+                    country = existing[code] = self.model(pk=None if pk in taken else pk, code=code, name=name)
+                    taken.add(pk)
+                    created.append(country)
+                elif country.name != name:
+                    country.name = name
+                    updated.append(country)
+            self.bulk_create([country for country in created if country.pk is not None])
+            # Move the id sequence past the ids given explicitly before countries without one are numbered
+            connection = connections[self.db]
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [self.model]):
+                    cursor.execute(sql)
+            self.bulk_create([country for country in created if country.pk is None])
+            self.bulk_update(updated, ['name'])
+        if created or updated:
+            self.invalidate()
+        return len(created), len(updated)
+
 
 class Country(models.Model):
     """All countries Data"""
     code = models.CharField(max_length=3)
     name = models.CharField(max_length=50)
 
+    objects = CountryManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['name'], name='country_name_idx')]
+
     def __str__(self):
         return self.name
 
 
+class CountryDescriptor(ForwardManyToOneDescriptor):
+    """Reads the related country from the country table, the database only for countries it does not know"""
+
+    def get_object(self, instance):
+        country = Country.objects.table().by_id.get(getattr(instance, self.field.attname))
+        if country is None:
+            return super(CountryDescriptor, self).get_object(instance)
+        return country
+
+
+class CountryForeignKey(models.ForeignKey):
+    forward_related_accessor_class = CountryDescriptor
+
+
 class Organisation(models.Model):
     """Property Management Companies or Estate Agents"""
     company_name = models.CharField(max_length=255)
     address = models.CharField(max_length=255)
     city = models.CharField(max_length=255)
-    country = models.ForeignKey('Country', on_delete=models.CASCADE)
+    country = CountryForeignKey('Country', on_delete=models.CASCADE)
     phone = models.CharField(max_length=255)
     email = models.EmailField
     is_active = models.BooleanField(default=True)
@@ -97,12 +219,35 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 
+# In the default cache, shared by every process (see CACHES in settings.py), so deleting the key on a change
+# reaches all of them
+PROPERTY_MANAGER_CACHE_KEY = 'property_manager:%s'
+PROPERTY_MANAGER_CACHE_TIMEOUT = 60 * 5
+
+
+class PropertyManagerManager(models.Manager):
+    """Cached lookups of the manager profile behind a user account"""
+
+    def for_user(self, user):
+        """Returns the PropertyManager (with its organisation) for a user, served from cache when possible"""
+
+        key = PROPERTY_MANAGER_CACHE_KEY % user.pk
+        manager = cache.get(key)
+        if manager is None:
+            manager = self.select_related('organisation').get(user_id=user.pk)
+            cache.set(key, manager, PROPERTY_MANAGER_CACHE_TIMEOUT)
+
+        return manager
+
+
 class PropertyManager(models.Model):
     """Property Manager who will be using the platform"""
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     organisation = models.ForeignKey('Organisation', on_delete=models.CASCADE)
     details = models.TextField(blank=True)
 
+    objects = PropertyManagerManager()
+
     def __str__(self):
         return self.user.email
 
@@ -113,13 +258,15 @@ class LandLord(models.Model):
     phone = models.CharField(max_length=255)
     address = models.CharField(max_length=255)
     city = models.CharField(max_length=255)
-    country = models.ForeignKey('Country', on_delete=models.CASCADE, related_name='country')
+    country = CountryForeignKey('Country', on_delete=models.CASCADE, related_name='country')
     identification_type = models.CharField(max_length=55, choices=settings.ID_TYPES)
     identification = models.CharField(max_length=255)
-    nationality = models.ForeignKey('Country', on_delete=models.CASCADE, related_name='nationality')
+    nationality = CountryForeignKey('Country', on_delete=models.CASCADE, related_name='nationality')
     bank = models.CharField(max_length=255)
     bank_branch = models.CharField(max_length=255)
     bank_account_number = models.CharField(max_length=255)
+    # Charged on the rent collected for the landlord, see manager/statements.py
+    management_fee_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
     details = models.TextField(blank=True)
     representative = models.CharField(max_length=255, blank=True)
     managed_by = models.ForeignKey('Organisation', on_delete=models.CASCADE, default=2)
@@ -127,6 +274,12 @@ class LandLord(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['managed_by', 'id'], name='landlord_org_active_idx', condition=Q(is_active=True)),
+            models.Index(fields=['managed_by', 'name'], name='landlord_org_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -134,6 +287,31 @@ class LandLord(models.Model):
         return reverse_lazy('manager:landlord_detail', kwargs={'pk': self.pk})
 
 
+class PropertyQuerySet(models.QuerySet):
+    """Spatial lookups over geocoded properties"""
+
+    def within_bbox(self, south, west, north, east):
+        """Properties whose coordinates fall inside a bounding box"""
+
+        return self.filter(latitude__range=(south, north), longitude__range=(west, east))
+
+    def within_radius(self, latitude, longitude, km):
+        """
+            Properties within `km` of a point, nearest first, each annotated with distance_km.
+            The index narrows the search to the enclosing box; only those rows are measured exactly.
+        """
+
+        lat_delta = km / KM_PER_DEGREE
+        lng_delta = km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        nearby = []
+        for property_obj in self.within_bbox(latitude - lat_delta, longitude - lng_delta,
+                                             latitude + lat_delta, longitude + lng_delta):
+            property_obj.distance_km = haversine_km(latitude, longitude, property_obj.latitude, property_obj.longitude)
+            if property_obj.distance_km <= km:
+                nearby.append(property_obj)
+        return sorted(nearby, key=lambda p: p.distance_km)
+
+
 class Property(models.Model):
     """Property Instance, can be a building, land, land and building"""
     property_type = models.CharField(max_length=55, choices=settings.PROPERTY_TYPES)
@@ -143,7 +321,7 @@ class Property(models.Model):
     property_value = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
     address = models.CharField(max_length=255)
     city = models.CharField(max_length=255)
-    country = models.ForeignKey('Country', on_delete=models.CASCADE)
+    country = CountryForeignKey('Country', on_delete=models.CASCADE)
     description = models.TextField()
     lot_size = models.DecimalField(max_digits=15, decimal_places=3, default=0.000)
     building_size = models.DecimalField(max_digits=15, decimal_places=3, default=0.000)
@@ -151,6 +329,8 @@ class Property(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     geographic_location = models.CharField(max_length=255, blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
     first_erected_date = models.DateField(blank=True, null=True)
     property_acquired_date = models.DateField(blank=True, null=True)
     acquisition_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
@@ -161,6 +341,15 @@ class Property(models.Model):
     zone = models.CharField(max_length=255, blank=True, null=True)
     details = models.TextField(blank=True, null=True)
 
+    objects = PropertyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['organisation_managing', 'latitude', 'longitude']),
+            models.Index(fields=['organisation_managing', 'id'], name='property_org_active_idx',
+                         condition=Q(is_active=True)),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -179,6 +368,12 @@ class PropertyUnit(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
     details = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'id'], name='unit_property_active_idx', condition=Q(is_active=True)),
+            models.Index(fields=['property', 'unit_title'], name='unit_property_title_idx'),
+        ]
+
     def __str__(self):
         return self.unit_title
 
@@ -198,6 +393,12 @@ class Premise(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
     details = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'id'], name='premise_property_active_idx', condition=Q(is_active=True)),
+            models.Index(fields=['property', 'premise_title'], name='premise_property_title_idx'),
+        ]
+
     def __str__(self):
         return self.premise_title
 
@@ -217,13 +418,16 @@ class Tenant(models.Model):
     phone_2 = models.CharField(max_length=20, blank=True, null=True)
     postal_address = models.TextField()
     domicile_address = models.TextField(blank=True, null=True)
-    nationality = models.ForeignKey('Country', on_delete=models.CASCADE)
+    nationality = CountryForeignKey('Country', on_delete=models.CASCADE)
     details = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
     date_created = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
     lease = models.OneToOneField('Lease', on_delete=models.CASCADE, related_name=_('lease'), blank=True, null=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['property', 'id'], name='tenant_property_active_idx', condition=Q(is_active=True))]
+
     def __str__(self):
         return self.tenant_name
 
@@ -265,16 +469,1034 @@ class Lease(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['organization_managing', 'id'], name='lease_org_active_idx',
+                                condition=Q(is_active=True))]
+
     def __str__(self):
         return self.tenant_lessee.tenant_name
 
     def get_absolute_url(self):
         return reverse_lazy('manager:tenant_lease_detail',
-                            kwargs={'pk': self.pk, 'prop': self.tenant_lessee.property.pk, 'ten': self.tenant_lessee.pk})
+                            kwargs={'pk': self.pk, 'prop': self.tenant_lessee.property_id, 'ten': self.tenant_lessee_id})
+
+
+class GeocodeJobManager(models.Manager):
+    """Queue operations for background geocoding"""
+
+    def enqueue(self, property_obj):
+        """Queues a property for geocoding, reusing a job that is already waiting"""
+
+        job = self.filter(property=property_obj, status=GeocodeJob.PENDING).first()
+        if job is None:
+            job = self.create(property=property_obj)
+        return job
+
+    def claim(self, limit):
+        """
+            Marks up to `limit` due jobs as running and returns them; safe to call from several workers.
+            Jobs left running for GEOCODER_JOB_TIMEOUT seconds, by a worker that crashed or was restarted,
+            are due again.
+        """
+
+        now = timezone.now()
+        stale = now - datetime.timedelta(seconds=settings.GEOCODER_JOB_TIMEOUT)
+        due = list(self.filter(Q(status=GeocodeJob.PENDING, run_after__lte=now) |
+                               Q(status=GeocodeJob.RUNNING, last_updated__lt=stale))
+                   .order_by('run_after').values_list('id', 'status', 'last_updated')[:limit])
+        claimed = []
+        for job_id, status, last_updated in due:
+            # Only one worker sees the job unchanged since it was listed
+            if self.filter(id=job_id, status=status, last_updated=last_updated).update(
+                    status=GeocodeJob.RUNNING, last_updated=now):
+                claimed.append(job_id)
+        return self.filter(id__in=claimed).select_related('property__country')
+
+
+class GeocodeJob(models.Model):
+    """Background geocoding of a property's address, processed by the geocode_worker command"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    ]
+
+    property = models.ForeignKey('Property', on_delete=models.CASCADE, related_name='geocode_jobs')
+    status = models.CharField(max_length=20, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    objects = GeocodeJobManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return '%s (%s)' % (self.property, self.status)
+
+
+class GeocodeCache(models.Model):
+    """Geocoder results keyed by normalised address, shared by all properties at that address"""
+    address = models.CharField(max_length=255, unique=True)
+    label = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    hits = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+    date_cached = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.address
+
+    @property
+    def found(self):
+        return self.latitude is not None
+
+
+class OrganisationStatsManager(models.Manager):
+    """Rebuilds of the dashboard statistics from the portfolio tables"""
+
+    def for_organisation(self, organisation):
+        """The organisation's stats row, built on first use"""
+
+        stats = self.filter(organisation=organisation).first()
+        if stats is None:
+            self.rebuild([organisation.pk])
+            stats = self.get(organisation=organisation)
+        return stats
+
+    def rebuild(self, organisation_ids=None):
+        """
+            Recounts stats for the given organisations (all when None) with one grouped query per figure. The
+            organisations are locked so concurrent rebuilds take turns rather than insert the same row twice,
+            and so are their stats rows, so a change applied meanwhile lands after the recount, not under it.
+        """
+
+        with transaction.atomic():
+            organisations = Organisation.objects.select_for_update().order_by('pk')
+            if organisation_ids is not None:
+                organisations = organisations.filter(pk__in=organisation_ids)
+            totals = {pk: {field: 0 for field in OrganisationStats.FIGURES}
+                      for pk in organisations.values_list('pk', flat=True)}
+            list(self.select_for_update().filter(organisation_id__in=totals.keys()).values_list('pk', flat=True))
+            self.recount(totals)
+            self.filter(organisation_id__in=totals.keys()).delete()
+            self.bulk_create([OrganisationStats(organisation_id=pk, **figures) for pk, figures in totals.items()])
+        return len(totals)
+
+    def recount(self, totals):
+        """Adds each organisation's figures to its dict in `totals`, keyed by organisation id"""
+
+        def add(figure, rows):
+            for organisation_id, value in rows:
+                if organisation_id in totals:
+                    totals[organisation_id][figure] += value or 0
+
+        add('landlords', LandLord.objects.filter(is_active=True)
+            .values_list('managed_by').annotate(Count('id')).order_by())
+        add('properties', Property.objects.filter(is_active=True)
+            .values_list('organisation_managing').annotate(Count('id')).order_by())
+        add('units', PropertyUnit.objects.filter(is_active=True)
+            .values_list('property__organisation_managing').annotate(Count('id')).order_by())
+        add('premises', Premise.objects.filter(is_active=True)
+            .values_list('property__organisation_managing').annotate(Count('id')).order_by())
+        add('vacancies', PropertyUnit.objects.filter(is_active=True, is_vacant=True)
+            .values_list('property__organisation_managing').annotate(Count('id')).order_by())
+        add('vacancies', Premise.objects.filter(is_active=True, is_vacant=True)
+            .values_list('property__organisation_managing').annotate(Count('id')).order_by())
+        add('tenants', Tenant.objects.filter(is_active=True)
+            .values_list('property__organisation_managing').annotate(Count('id')).order_by())
+        add('active_leases', Lease.objects.filter(is_active=True)
+            .values_list('organization_managing').annotate(Count('id')).order_by())
+        add('monthly_rent', Lease.objects.filter(is_active=True)
+            .values_list('organization_managing').annotate(Sum('monthly_rent_amount')).order_by())
+
+    def apply(self, organisation_id, changes):
+        """Adds `changes` to the organisation's figures"""
+
+        changes = {figure: change for figure, change in changes.items() if change}
+        if organisation_id is None or not changes:
+            return
+        # A missing row is counted from scratch on first use (for_organisation), so there is nothing to update;
+        # building it here would resurrect the row of an organisation that is being deleted
+        self.filter(organisation_id=organisation_id).update(
+            **{figure: F(figure) + change for figure, change in changes.items()}
+        )
+
+
+class OrganisationStats(models.Model):
+    """Portfolio figures for the dashboard, kept current by signals on the portfolio models"""
+    FIGURES = ['tenants', 'landlords', 'properties', 'premises', 'units', 'vacancies', 'active_leases',
+               'monthly_rent']
+
+    organisation = models.OneToOneField('Organisation', on_delete=models.CASCADE, related_name='stats')
+    tenants = models.IntegerField(default=0)
+    landlords = models.IntegerField(default=0)
+    properties = models.IntegerField(default=0)
+    premises = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    vacancies = models.IntegerField(default=0)
+    active_leases = models.IntegerField(default=0)
+    monthly_rent = models.DecimalField(max_digits=17, decimal_places=2, default=0.00)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    objects = OrganisationStatsManager()
+
+    def __str__(self):
+        return str(self.organisation)
+
+
+class PropertyOccupancyManager(models.Manager):
+    """Rebuilds of the per-property occupancy figures from units and premises"""
+
+    def for_property(self, property_obj):
+        """The property's occupancy row, built on first use"""
+
+        occupancy = self.filter(property=property_obj).first()
+        if occupancy is None:
+            # Pages are rendered from the new row, there is no stale one to retire
+            self.recount(Property.objects.filter(pk=property_obj.pk))
+            occupancy = self.get(property=property_obj)
+        return occupancy
+
+    def rebuild(self, properties=None):
+        """Recounts occupancy of the given properties (a queryset, all when None) and retires their pages"""
+
+        property_ids = self.recount(properties)
+        # Property pages show the figures, bulk_create and update send no signals to retire them
+        retire_detail_pages(Property, property_ids)
+        return len(property_ids)
+
+    def recount(self, properties=None):
+        """Rewrites the occupancy rows of the given properties with grouped queries, returns their ids"""
+
+        properties = Property.objects.all() if properties is None else properties
+        totals = {pk: {field: 0 for field in PropertyOccupancy.FIGURES}
+                  for pk in properties.values_list('pk', flat=True)}
+
+        for model, count, occupied in ((PropertyUnit, 'units', 'occupied_units'),
+                                       (Premise, 'premises', 'occupied_premises')):
+            rows = model.objects.filter(property__in=properties.values('pk'), is_active=True) \
+                .values_list('property', 'is_vacant').annotate(Count('id'), Sum('total_area')).order_by()
+            for property_id, is_vacant, spaces, area in rows:
+                figures = totals[property_id]
+                figures[count] += spaces
+                figures['total_area'] += area or 0
+                if not is_vacant:
+                    figures[occupied] += spaces
+                    figures['occupied_area'] += area or 0
+
+        with transaction.atomic():
+            self.filter(property_id__in=totals.keys()).delete()
+            self.bulk_create([PropertyOccupancy(property_id=pk, **figures) for pk, figures in totals.items()])
+        return list(totals)
+
+    def apply(self, property_id, changes):
+        """Adds `changes` to the property's figures"""
+
+        changes = {figure: change for figure, change in changes.items() if change}
+        if property_id is None or not changes:
+            return
+        # A missing row is counted from scratch on first use, so there is nothing to update; building it here
+        # could also resurrect the row of a property that is being deleted
+        self.filter(property_id=property_id).update(
+            **{figure: F(figure) + change for figure, change in changes.items()}
+        )
+        retire_detail_pages(Property, [property_id])
+
+
+class PropertyOccupancy(models.Model):
+    """Let and lettable units and premises of a property, kept current by signals on PropertyUnit and Premise"""
+    FIGURES = ['units', 'occupied_units', 'premises', 'occupied_premises', 'total_area', 'occupied_area']
+
+    property = models.OneToOneField('Property', on_delete=models.CASCADE, related_name='occupancy')
+    units = models.IntegerField(default=0)
+    occupied_units = models.IntegerField(default=0)
+    premises = models.IntegerField(default=0)
+    occupied_premises = models.IntegerField(default=0)
+    total_area = models.DecimalField(max_digits=17, decimal_places=3, default=0.000)
+    occupied_area = models.DecimalField(max_digits=17, decimal_places=3, default=0.000)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    objects = PropertyOccupancyManager()
+
+    def __str__(self):
+        return str(self.property)
+
+    def spaces(self):
+        return self.units + self.premises
+
+    def occupied_spaces(self):
+        return self.occupied_units + self.occupied_premises
+
+    def vacant_spaces(self):
+        return self.spaces() - self.occupied_spaces()
+
+    def occupancy_rate(self):
+        """Share of lettable area that is let, as a percentage"""
+
+        return round(100 * self.occupied_area / self.total_area, 1) if self.total_area else 0
+
+
+def anniversary(date, years):
+    """The same day `years` years later, 28 February standing in for 29 February"""
+
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:
+        return date.replace(year=date.year + years, day=28)
+
+
+def lease_event_dates(lease, until):
+    """(kind, date) of every calendar event of a lease up to `until`; inactive leases have none"""
+
+    if not lease.is_active:
+        return []
+    events = [(LeaseEvent.OCCUPATION, lease.occupation_date), (LeaseEvent.REVIEW, lease.rent_review_date)]
+    if lease.lease_ends and not lease.lease_indefinite_thereafter:
+        events.append((LeaseEvent.EXPIRY, lease.lease_ends))
+        until = min(until, lease.lease_ends)
+    years = 0
+    while anniversary(lease.annual_rent_review_date, years) <= until:
+        events.append((LeaseEvent.ANNUAL_REVIEW, anniversary(lease.annual_rent_review_date, years)))
+        years += 1
+    return events
+
+
+class LeaseEventManager(models.Manager):
+    EVENT_FIELDS = ['organization_managing', 'is_active', 'occupation_date', 'lease_ends',
+                    'lease_indefinite_thereafter', 'rent_review_date', 'annual_rent_review_date']
+
+    def horizon(self):
+        return anniversary(timezone.localdate(), settings.LEASE_EVENT_HORIZON_YEARS)
+
+    def replace(self, lease):
+        """Rewrites the events of one lease"""
+
+        with transaction.atomic():
+            self.filter(lease=lease).delete()
+            self.bulk_create([
+                LeaseEvent(lease_id=lease.pk, organisation_id=lease.organization_managing_id, kind=kind, date=date)
+                for kind, date in lease_event_dates(lease, self.horizon())
+            ])
+
+    def rebuild(self, leases=None, chunk_size=2000):
+        """Rewrites the events of the given leases (all when None) chunk_size leases at a time"""
+
+        leases = (Lease.objects.all() if leases is None else leases).only(*self.EVENT_FIELDS).order_by('pk')
+        until = self.horizon()
+        last_pk = 0
+        rebuilt = 0
+        while True:
+            chunk = list(leases.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                return rebuilt
+            with transaction.atomic():
+                self.filter(lease__in=[lease.pk for lease in chunk]).delete()
+                self.bulk_create([
+                    LeaseEvent(lease_id=lease.pk, organisation_id=lease.organization_managing_id, kind=kind, date=date)
+                    for lease in chunk for kind, date in lease_event_dates(lease, until)
+                ])
+            last_pk = chunk[-1].pk
+            rebuilt += len(chunk)
+
+
+class LeaseEvent(models.Model):
+    """Lease dates for the calendar, one row per occurrence so upcoming events are an index range scan"""
+    EXPIRY = 'expiry'
+    REVIEW = 'review'
+    ANNUAL_REVIEW = 'annual_review'
+    OCCUPATION = 'occupation'
+    KINDS = [
+        (EXPIRY, _('Lease Expiry')),
+        (REVIEW, _('Rent Review')),
+        (ANNUAL_REVIEW, _('Annual Rent Review')),
+        (OCCUPATION, _('Occupation')),
+    ]
+
+    lease = models.ForeignKey('Lease', on_delete=models.CASCADE, related_name='events')
+    organisation = models.ForeignKey('Organisation', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    date = models.DateField()
+
+    objects = LeaseEventManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['organisation', 'date'])]
+
+    def __str__(self):
+        return '%s %s' % (self.get_kind_display(), self.date)
+
+
+class SearchEntryManager(models.Manager):
+    """
+        Keeps the search side table in step with landlords, properties and tenants and queries it.
+        PostgreSQL matches `document` through a GIN tsvector index; other databases use SearchTrigram rows.
+    """
+
+    def uses_full_text(self):
+        return connections[self.db].vendor == 'postgresql'
+
+    def describe(self, instance):
+        """(organisation id, title, detail, document) of a searchable instance, None when it is not searchable"""
+
+        if not instance.is_active:
+            return None
+        if isinstance(instance, LandLord):
+            return instance.managed_by_id, instance.name, instance.city, instance.name
+        if isinstance(instance, Property):
+            return instance.organisation_managing_id, instance.title, '%s, %s' % (instance.address, instance.city), \
+                ' '.join([instance.title, instance.address, instance.city])
+        return instance.property.organisation_managing_id, instance.tenant_name, instance.property.title, ' '.join(
+            filter(None, [instance.tenant_name, instance.trading_as_list_name, instance.identification,
+                          instance.email_1, instance.email_2]))
+
+    def entry(self, instance):
+        """An unsaved entry for an instance, None when it is not searchable"""
+
+        described = self.describe(instance)
+        if described is None:
+            return None
+        organisation_id, title, detail, document = described
+        return SearchEntry(organisation_id=organisation_id, kind=SearchEntry.KINDS_BY_MODEL[type(instance)],
+                           object_id=instance.pk, title=title[:255], detail=(detail or '')[:255],
+                           url=str(instance.get_absolute_url()), document=normalise(document))
+
+    def index(self, instance):
+        """Adds, refreshes or (for inactive instances) removes the entry of one instance"""
+
+        kind = SearchEntry.KINDS_BY_MODEL[type(instance)]
+        entry = self.entry(instance)
+        with transaction.atomic():
+            self.filter(kind=kind, object_id=instance.pk).delete()
+            if entry is not None:
+                entry.save()
+                if not self.uses_full_text():
+                    SearchTrigram.objects.bulk_create(entry.trigram_rows())
+
+    def unindex(self, instance):
+        self.filter(kind=SearchEntry.KINDS_BY_MODEL[type(instance)], object_id=instance.pk).delete()
+
+    def add(self, instances):
+        """Indexes many instances with bulk inserts, replacing any entries they already have"""
+
+        entries = [entry for entry in (self.entry(instance) for instance in instances) if entry is not None]
+        with transaction.atomic():
+            for kind in {entry.kind for entry in entries}:
+                self.filter(kind=kind, object_id__in=[e.object_id for e in entries if e.kind == kind]).delete()
+            start = self.order_by('-pk').values_list('pk', flat=True).first() or 0
+            self.bulk_create(entries)
+            if not self.uses_full_text():
+                SearchTrigram.objects.bulk_create([
+                    row for entry in self.filter(pk__gt=start) for row in entry.trigram_rows()
+                ])
+        return len(entries)
+
+    def rebuild(self, organisation_ids=None, chunk_size=2000):
+        """Re-indexes every landlord, property and tenant of the given organisations (all when None)"""
+
+        sources = [
+            LandLord.objects.filter(is_active=True),
+            Property.objects.filter(is_active=True),
+            Tenant.objects.filter(is_active=True).select_related('property'),
+        ]
+        entries = self.all()
+        if organisation_ids is not None:
+            entries = entries.filter(organisation_id__in=organisation_ids)
+            sources = [sources[0].filter(managed_by__in=organisation_ids),
+                       sources[1].filter(organisation_managing__in=organisation_ids),
+                       sources[2].filter(property__organisation_managing__in=organisation_ids)]
+        entries.delete()
+
+        indexed = 0
+        for queryset in sources:
+            last_pk = 0
+            while True:
+                chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+                if not chunk:
+                    break
+                indexed += self.add(chunk)
+                last_pk = chunk[-1].pk
+        return indexed
+
+    def search(self, organisation, query, kinds=None, limit=20):
+        """The organisation's best matching entries for `query`, best first"""
+
+        if not normalise(query):
+            return []
+        entries = self.filter(organisation=organisation)
+        if kinds:
+            entries = entries.filter(kind__in=kinds)
+
+        if self.uses_full_text():
+            vector = "to_tsvector('simple', manager_searchentry.document)"
+            terms = tsquery(query)
+            return list(entries.annotate(
+                rank=RawSQL("ts_rank(%s, to_tsquery('simple', %%s))" % vector, [terms])
+            ).extra(
+                where=["%s @@ to_tsquery('simple', %%s)" % vector], params=[terms]
+            ).order_by('-rank', 'title')[:limit])
+
+        grams = trigrams(query, prefix=True)
+        matches = SearchTrigram.objects.filter(organisation=organisation, trigram__in=grams)
+        if kinds:
+            matches = matches.filter(entry__kind__in=kinds)
+        ranked = list(matches.values_list('entry_id').annotate(hits=Count('id'))
+                      .filter(hits__gte=trigram_threshold(grams)).order_by('-hits', 'entry_id')[:limit])
+        found = entries.in_bulk([entry_id for entry_id, hits in ranked])
+        results = []
+        for entry_id, hits in ranked:
+            if entry_id in found:
+                found[entry_id].rank = hits / len(grams)
+                results.append(found[entry_id])
+        return results
+
+
+class SearchEntry(models.Model):
+    """A searchable landlord, property or tenant, one row per object"""
+    LANDLORD = 'landlord'
+    PROPERTY = 'property'
+    TENANT = 'tenant'
+    KINDS = [
+        (LANDLORD, _('LandLord')),
+        (PROPERTY, _('Property')),
+        (TENANT, _('Tenant')),
+    ]
+    KINDS_BY_MODEL = {LandLord: LANDLORD, Property: PROPERTY, Tenant: TENANT}
+
+    organisation = models.ForeignKey('Organisation', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.IntegerField()
+    title = models.CharField(max_length=255)
+    detail = models.CharField(max_length=255, blank=True)
+    url = models.CharField(max_length=255)
+    document = models.TextField()
+
+    objects = SearchEntryManager()
+
+    class Meta:
+        unique_together = [('kind', 'object_id')]
+
+    def __str__(self):
+        return self.title
+
+    def trigram_rows(self):
+        return [SearchTrigram(entry_id=self.pk, organisation_id=self.organisation_id, trigram=gram)
+                for gram in trigrams(self.document)]
+
+
+class SearchTrigram(models.Model):
+    """Three letter slices of a search entry, the search index on databases without full text search"""
+    entry = models.ForeignKey('SearchEntry', on_delete=models.CASCADE, related_name='trigrams')
+    organisation = models.ForeignKey('Organisation', on_delete=models.CASCADE)
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [models.Index(fields=['organisation', 'trigram', 'entry'])]
+
+
+def month_end(date):
+    """The last day of `date`'s month"""
+
+    return (date.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+
+
+class LedgerEntryManager(models.Manager):
+    """
+        Appends to lease accounts. Every entry carries the account balance after it, so a balance is read from
+        the latest entry instead of summing the history. Postings to one account are serialised by locking its
+        lease row.
+    """
+
+    def lock(self, lease_ids):
+        list(Lease.objects.using(self.db).select_for_update().filter(pk__in=lease_ids).values_list('pk', flat=True))
+
+    def balance(self, lease):
+        return self.filter(lease=lease).order_by('-id').values_list('balance', flat=True).first() or ZERO
+
+    def balances(self, leases):
+        """Lease queryset annotated with `balance`, None for accounts without entries"""
+
+        return leases.annotate(balance=models.Subquery(
+            self.filter(lease=models.OuterRef('pk')).order_by('-id').values('balance')[:1]
+        ))
+
+    def post(self, lease, kind, amount, date=None, period=None, reference=''):
+        """
+            Appends one entry to a lease's account; charges are positive amounts, payments negative.
+            Open payments are then allocated to open charges and the lease's arrears ageing is refreshed.
+        """
+
+        with transaction.atomic(using=self.db):
+            self.lock([lease.pk])
+            entry = self.create(organisation_id=lease.organization_managing_id, lease_id=lease.pk, kind=kind,
+                                amount=amount, balance=self.balance(lease) + amount,
+                                date=date or timezone.localdate(), period=period, reference=reference)
+            Allocation.objects.allocate([lease.pk])
+            ArrearsAgeing.objects.refresh([lease.pk])
+        return entry
+
+    def post_payment(self, lease, amount, date=None, reference=''):
+        """Records a payment received, it settles the oldest charges it covers"""
+
+        return self.post(lease, LedgerEntry.PAYMENT, -amount, date, reference=reference)
+
+
+class LedgerEntry(models.Model):
+    """One line of a lease account: a charge raised against the tenant or a payment received from them"""
+    RENT = 'rent'
+    RATES = 'rates'
+    RECOVERY = 'recovery'
+    INTEREST = 'interest'
+    PAYMENT = 'payment'
+    KINDS = [
+        (RENT, _('Rent')),
+        (RATES, _('Rates')),
+        (RECOVERY, _('Recoveries')),
+        (INTEREST, _('Late Payment Interest')),
+        (PAYMENT, _('Payment')),
+    ]
+    CHARGES = [RENT, RATES, RECOVERY, INTEREST]
+
+    organisation = models.ForeignKey('Organisation', on_delete=models.CASCADE)
+    lease = models.ForeignKey('Lease', on_delete=models.CASCADE, related_name='ledger')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    # The month a charge is for, none for payments
+    period = models.DateField(blank=True, null=True)
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    reference = models.CharField(max_length=255, blank=True)
+    billing_run = models.ForeignKey('BillingRun', on_delete=models.SET_NULL, blank=True, null=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    objects = LedgerEntryManager()
+
+    class Meta:
+        indexes = [
+            # The latest balance of an account is the first row of an index-only scan
+            models.Index(fields=['lease', 'id', 'balance'], name='ledger_lease_balance_idx'),
+            models.Index(fields=['organisation', 'date'], name='ledger_org_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['lease', 'kind', 'period'], condition=Q(period__isnull=False),
+                                    name='ledger_charge_once_per_period'),
+        ]
+
+    def __str__(self):
+        return '%s %s' % (self.get_kind_display(), self.amount)
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Ledger entries are never changed, post a correcting entry instead')
+        super(LedgerEntry, self).save(*args, **kwargs)
+
+
+class AllocationManager(models.Manager):
+
+    def allocate(self, lease_ids):
+        """Applies the unallocated part of each lease's payments to its oldest outstanding charges"""
+
+        amount = models.DecimalField(max_digits=15, decimal_places=2)
+        entries = LedgerEntry.objects.filter(lease_id__in=lease_ids).order_by('lease_id', 'date', 'id')
+        charges = entries.filter(kind__in=LedgerEntry.CHARGES).annotate(
+            open=F('amount') - Coalesce(Sum('allocations__amount'), Value(ZERO), output_field=amount)
+        ).filter(open__gt=0)
+        payments = entries.filter(kind=LedgerEntry.PAYMENT).annotate(
+            open=-F('amount') - Coalesce(Sum('allocated_to__amount'), Value(ZERO), output_field=amount)
+        ).filter(open__gt=0)
+
+        outstanding = collections.defaultdict(list)
+        for charge_id, lease_id, open_amount in charges.values_list('id', 'lease_id', 'open'):
+            outstanding[lease_id].append([charge_id, open_amount])
+        allocations = []
+        for payment_id, lease_id, available in payments.values_list('id', 'lease_id', 'open'):
+            queue = outstanding[lease_id]
+            while available > 0 and queue:
+                charge = queue[0]
+                applied = min(available, charge[1])
+                allocations.append(Allocation(payment_id=payment_id, charge_id=charge[0], amount=applied))
+                available -= applied
+                charge[1] -= applied
+                if not charge[1]:
+                    queue.pop(0)
+        self.bulk_create(allocations)
+        return len(allocations)
+
+
+class Allocation(models.Model):
+    """The part of a payment that settles a charge"""
+    payment = models.ForeignKey('LedgerEntry', on_delete=models.CASCADE, related_name='allocated_to')
+    charge = models.ForeignKey('LedgerEntry', on_delete=models.CASCADE, related_name='allocations')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    objects = AllocationManager()
+
+
+class BillingRun(models.Model):
+    """The monthly charges raised for an organisation; billing a month again only adds what is missing"""
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUSES = [
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+    ]
+
+    organisation = models.ForeignKey('Organisation', on_delete=models.CASCADE)
+    period = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUSES, default=RUNNING)
+    leases = models.IntegerField(default=0)
+    charges = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    started = models.DateTimeField(default=timezone.now)
+    finished = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = [('organisation', 'period')]
+
+    def __str__(self):
+        return '%s %s' % (self.organisation, self.period.strftime('%B %Y'))
+
+
+class ArrearsAgeingManager(models.Manager):
+    """
+        Keeps one row per lease in arrears with its unpaid charges split by age. Postings refresh the rows of
+        the leases they touch; as charges age from one bucket to the next with the calendar, the whole table is
+        rebuilt nightly (manage.py rebuild_arrears).
+    """
+
+    def ageing_rows(self, lease_ids, as_of):
+        """Unsaved rows for the leases among lease_ids that have unpaid charges"""
+
+        amount = models.DecimalField(max_digits=15, decimal_places=2)
+        unpaid = LedgerEntry.objects.filter(lease_id__in=lease_ids, kind__in=LedgerEntry.CHARGES).annotate(
+            open=F('amount') - Coalesce(Sum('allocations__amount'), Value(ZERO), output_field=amount)
+        ).filter(open__gt=0).values_list('lease_id', 'date', 'open')
+
+        rows = {}
+        for lease_id, date, open_amount in unpaid:
+            row = rows.get(lease_id)
+            if row is None:
+                row = rows[lease_id] = ArrearsAgeing(lease_id=lease_id, as_of=as_of)
+            bucket = ArrearsAgeing.bucket((as_of - date).days)
+            setattr(row, bucket, getattr(row, bucket) + open_amount)
+            row.total += open_amount
+        owners = Lease.objects.filter(pk__in=list(rows)).values_list(
+            'pk', 'organization_managing_id', 'tenant_lessee_id', 'tenant_lessee__property_id', 'owner_lessor_id'
+        )
+        for lease_id, organisation_id, tenant_id, property_id, landlord_id in owners:
+            row = rows[lease_id]
+            row.organisation_id, row.tenant_id, row.property_id, row.landlord_id = \
+                organisation_id, tenant_id, property_id, landlord_id
+        return list(rows.values())
+
+    def refresh(self, lease_ids, as_of=None):
+        """
+            Rewrites the rows of the given leases in one transaction. The leases are locked as for posting
+            (LedgerEntry.objects.lock), so a concurrent payment is either included or refreshes the rows after.
+        """
+
+        with transaction.atomic(using=self.db):
+            LedgerEntry.objects.lock(lease_ids)
+            rows = self.ageing_rows(lease_ids, as_of or timezone.localdate())
+            self.filter(lease_id__in=lease_ids).delete()
+            self.bulk_create(rows)
+        return len(rows)
+
+    def rebuild(self, organisation_ids=None, as_of=None, chunk_size=2000):
+        """
+            Rewrites the rows of every lease of the given organisations (all when None), chunk_size leases per
+            transaction. The report keeps showing the other chunks' rows while a chunk is rewritten.
+        """
+
+        as_of = as_of or timezone.localdate()
+        leases = Lease.objects.order_by('pk').values_list('pk', flat=True)
+        if organisation_ids is not None:
+            leases = leases.filter(organization_managing__in=organisation_ids)
+
+        in_arrears = 0
+        last_pk = 0
+        while True:
+            lease_ids = list(leases.filter(pk__gt=last_pk)[:chunk_size])
+            if not lease_ids:
+                return in_arrears
+            in_arrears += self.refresh(lease_ids, as_of)
+            last_pk = lease_ids[-1]
+
+
+class ArrearsAgeing(models.Model):
+    """A lease's unpaid charges by age on `as_of`, for the arrears report"""
+    BUCKETS = ['current', 'days_30', 'days_60', 'days_90', 'days_120']
+
+    organisation = models.ForeignKey('Organisation', on_delete=models.CASCADE)
+    lease = models.OneToOneField('Lease', on_delete=models.CASCADE, related_name='arrears')
+    tenant = models.ForeignKey('Tenant', on_delete=models.CASCADE)
+    property = models.ForeignKey('Property', on_delete=models.CASCADE)
+    landlord = models.ForeignKey('LandLord', on_delete=models.CASCADE)
+    # Charges at most 30 days old, 31 to 60, 61 to 90, 91 to 120 and older
+    current = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    days_30 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    days_60 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    days_90 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    days_120 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    as_of = models.DateField()
+
+    objects = ArrearsAgeingManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['organisation', 'property'], name='arrears_org_property_idx')]
+
+    def __str__(self):
+        return '%s %s' % (self.lease, self.total)
+
+    @staticmethod
+    def bucket(days):
+        return ArrearsAgeing.BUCKETS[min(max(days - 1, 0) // 30, 4)]
+
+
+def property_organisation_id(property_id):
+    return Property.objects.filter(pk=property_id).values_list('organisation_managing_id', flat=True).first()
+
+
+def stats_contribution(instance):
+    """The organisation an instance counts towards and what it adds to that organisation's stats"""
+
+    active = int(instance.is_active)
+    if isinstance(instance, LandLord):
+        return instance.managed_by_id, {'landlords': active}
+    if isinstance(instance, Property):
+        return instance.organisation_managing_id, {'properties': active}
+    if isinstance(instance, PropertyUnit):
+        return property_organisation_id(instance.property_id), {
+            'units': active, 'vacancies': int(instance.is_active and instance.is_vacant)}
+    if isinstance(instance, Premise):
+        return property_organisation_id(instance.property_id), {
+            'premises': active, 'vacancies': int(instance.is_active and instance.is_vacant)}
+    if isinstance(instance, Tenant):
+        return property_organisation_id(instance.property_id), {'tenants': active}
+    return instance.organization_managing_id, {
+        'active_leases': active, 'monthly_rent': instance.monthly_rent_amount if instance.is_active else 0}
+
+
+def stats_before_save_callback(sender, instance, raw=False, *args, **kwargs):
+    previous = sender.objects.filter(pk=instance.pk).first() if instance.pk and not raw else None
+    # The occupancy and vacancy callbacks compare against the same row
+    instance._previous = previous
+    instance._stats_before = stats_contribution(previous) if previous is not None else None
+
+
+def stats_saved_callback(sender, instance, raw=False, *args, **kwargs):
+    if raw:
+        return
+    organisation_id, after = stats_contribution(instance)
+    before = getattr(instance, '_stats_before', None)
+    if before is not None and before[0] != organisation_id:
+        OrganisationStats.objects.apply(before[0], {figure: -value for figure, value in before[1].items()})
+        before = None
+    if before is not None:
+        after = {figure: value - before[1].get(figure, 0) for figure, value in after.items()}
+    OrganisationStats.objects.apply(organisation_id, after)
+
+
+def stats_deleted_callback(sender, instance, *args, **kwargs):
+    organisation_id, contribution = stats_contribution(instance)
+    OrganisationStats.objects.apply(organisation_id, {figure: -value for figure, value in contribution.items()})
+
+
+for stats_model in (LandLord, Property, PropertyUnit, Premise, Tenant, Lease):
+    pre_save.connect(stats_before_save_callback, sender=stats_model, dispatch_uid='stats_before_save')
+    post_save.connect(stats_saved_callback, sender=stats_model, dispatch_uid='stats_saved')
+    post_delete.connect(stats_deleted_callback, sender=stats_model, dispatch_uid='stats_deleted')
+
+
+def occupancy_contribution(space):
+    """What a unit or premise adds to its property's occupancy"""
+
+    active = int(space.is_active)
+    occupied = int(space.is_active and not space.is_vacant)
+    area = space.total_area if space.is_active else 0
+    figures = {'total_area': area, 'occupied_area': area if occupied else 0}
+    if isinstance(space, PropertyUnit):
+        figures.update(units=active, occupied_units=occupied)
+    else:
+        figures.update(premises=active, occupied_premises=occupied)
+    return space.property_id, figures
+
+
+def occupancy_saved_callback(sender, instance, raw=False, *args, **kwargs):
+    if raw:
+        return
+    property_id, after = occupancy_contribution(instance)
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        before_property_id, before = occupancy_contribution(previous)
+        if before_property_id != property_id:
+            PropertyOccupancy.objects.apply(before_property_id, {figure: -value for figure, value in before.items()})
+        else:
+            after = {figure: value - before[figure] for figure, value in after.items()}
+    PropertyOccupancy.objects.apply(property_id, after)
+
+
+def occupancy_deleted_callback(sender, instance, *args, **kwargs):
+    property_id, contribution = occupancy_contribution(instance)
+    PropertyOccupancy.objects.apply(property_id, {figure: -value for figure, value in contribution.items()})
+
+
+for space_model in (PropertyUnit, Premise):
+    post_save.connect(occupancy_saved_callback, sender=space_model, dispatch_uid='occupancy_saved')
+    post_delete.connect(occupancy_deleted_callback, sender=space_model, dispatch_uid='occupancy_deleted')
+
+
+def occupied_by_lease(today=None):
+    """Units and premises under an active lease that has not ended"""
+
+    today = today or timezone.localdate()
+    return Q(lease__is_active=True) & (
+        Q(lease__lease_ends__isnull=True) | Q(lease__lease_ends__gte=today) | Q(lease__lease_indefinite_thereafter=True)
+    )
+
+
+def refresh_vacancy(units=None, premises=None, today=None):
+    """
+        Derives is_vacant of the given units and premises (querysets, all when None) from their leases.
+        Only spaces whose state changes are saved, one at a time so stats and occupancy follow.
+    """
+
+    changed = 0
+    for model, spaces in ((PropertyUnit, units), (Premise, premises)):
+        spaces = model.objects.all() if spaces is None else spaces
+        occupied = model.objects.filter(occupied_by_lease(today)).values('pk')
+        for space in list(spaces.filter(is_vacant=True, pk__in=occupied)) + \
+                list(spaces.filter(is_vacant=False).exclude(pk__in=occupied)):
+            space.is_vacant = not space.is_vacant
+            space.save(update_fields=['is_vacant', 'last_updated'])
+            changed += 1
+    return changed
+
+
+def refresh_lease_spaces(*leases):
+    """Re-derives vacancy of the spaces a lease covers, before and after a change"""
+
+    units = {lease.property_unit_id for lease in leases if lease is not None} - {None}
+    premises = {lease.premises_id for lease in leases if lease is not None} - {None}
+    if units or premises:
+        refresh_vacancy(PropertyUnit.objects.filter(pk__in=units), Premise.objects.filter(pk__in=premises))
 
 
 @receiver(post_save, sender=Lease)
-def lease_created_callback(sender, instance, created, *args, **kwargs):
+def lease_created_callback(sender, instance, created, raw=False, *args, **kwargs):
     if created:
         Tenant.objects.filter(id=instance.tenant_lessee.id).update(lease=instance)
+    if not raw:
+        refresh_lease_spaces(instance, getattr(instance, '_previous', None))
+
+
+@receiver(post_delete, sender=Lease)
+def lease_deleted_callback(sender, instance, *args, **kwargs):
+    refresh_lease_spaces(instance)
+
+
+@receiver(post_save, sender=Lease)
+def lease_events_callback(sender, instance, raw=False, *args, **kwargs):
+    if not raw:
+        LeaseEvent.objects.replace(instance)
+
+
+def search_saved_callback(sender, instance, raw=False, *args, **kwargs):
+    if raw:
+        return
+    SearchEntry.objects.index(instance)
+    if isinstance(instance, Property):
+        # Tenant results show the title of their property
+        SearchEntry.objects.filter(
+            kind=SearchEntry.TENANT, object_id__in=Tenant.objects.filter(property=instance).values('pk')
+        ).update(detail=instance.title[:255])
+
+
+def search_deleted_callback(sender, instance, *args, **kwargs):
+    SearchEntry.objects.unindex(instance)
+
+
+for searchable_model in (LandLord, Property, Tenant):
+    post_save.connect(search_saved_callback, sender=searchable_model, dispatch_uid='search_saved')
+    post_delete.connect(search_deleted_callback, sender=searchable_model, dispatch_uid='search_deleted')
+
+
+DETAIL_VERSION_KEY = 'detail_version:%s:%s'
+
+
+def detail_version(model, pk):
+    """The current version of an object's detail page, part of the page's cache key"""
+
+    return cache.get_or_set(DETAIL_VERSION_KEY % (model._meta.model_name, pk), lambda: uuid.uuid4().hex, None)
+
+
+def retire_detail_pages(model, pks):
+    """Gives the objects new versions, so their cached detail pages are no longer served"""
+
+    versions = {DETAIL_VERSION_KEY % (model._meta.model_name, pk): uuid.uuid4().hex for pk in pks if pk is not None}
+    if versions:
+        cache.set_many(versions, None)
+
+
+def detail_page_dependents(instance):
+    """(model, ids) of the detail pages that show something of `instance`"""
+
+    if isinstance(instance, LandLord):
+        return [(LandLord, [instance.pk]),
+                (Property, Property.objects.filter(land_lord=instance).values_list('pk', flat=True)),
+                (Lease, Lease.objects.filter(owner_lessor=instance).values_list('pk', flat=True))]
+    if isinstance(instance, Property):
+        return [(Property, [instance.pk]),
+                (Tenant, Tenant.objects.filter(property=instance).values_list('pk', flat=True))]
+    if isinstance(instance, Tenant):
+        return [(Tenant, [instance.pk]),
+                (Lease, Lease.objects.filter(tenant_lessee=instance).values_list('pk', flat=True))]
+    if isinstance(instance, Lease):
+        return [(Lease, [instance.pk]), (Tenant, [instance.tenant_lessee_id])]
+    if isinstance(instance, Premise):
+        return [(Property, [instance.property_id]),
+                (Lease, Lease.objects.filter(premises=instance).values_list('pk', flat=True))]
+    # PropertyUnit
+    return [(Property, [instance.property_id]),
+            (Lease, Lease.objects.filter(property_unit=instance).values_list('pk', flat=True))]
+
+
+def detail_pages_changed_callback(sender, instance, raw=False, *args, **kwargs):
+    if raw:
+        return
+    for model, pks in detail_page_dependents(instance):
+        retire_detail_pages(model, pks)
+
+
+for page_model in (LandLord, Property, Tenant, Lease, Premise, PropertyUnit):
+    post_save.connect(detail_pages_changed_callback, sender=page_model, dispatch_uid='detail_pages_saved')
+    post_delete.connect(detail_pages_changed_callback, sender=page_model, dispatch_uid='detail_pages_deleted')
+
+
+@receiver(post_save, sender=PropertyManager)
+@receiver(post_delete, sender=PropertyManager)
+def property_manager_changed_callback(sender, instance, *args, **kwargs):
+    cache.delete(PROPERTY_MANAGER_CACHE_KEY % instance.user_id)
+
+
+@receiver(post_save, sender=Organisation)
+def organisation_changed_callback(sender, instance, *args, **kwargs):
+    user_ids = PropertyManager.objects.filter(organisation=instance).values_list('user_id', flat=True)
+    cache.delete_many([PROPERTY_MANAGER_CACHE_KEY % user_id for user_id in user_ids])
+
 
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def country_changed_callback(sender, instance, *args, **kwargs):
+    Country.objects.invalidate()
@@ -0,0 +1,99 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+class KeysetPage(object):
+    """One page of a seek paginated list, navigated with cursors instead of page numbers"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, total_count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total_count = total_count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+
+
+class KeysetPaginationMixin(object):
+    """
+        Seek pagination for ListViews. Pages are fetched with ?after= / ?before= cursors holding the
+        keyset_ordering values of the last / first row shown, so page 500 costs the same as page 1.
+        keyset_ordering must end with a unique column. Override get_total_count() to show a total.
+    """
+    paginate_by = 10
+    keyset_ordering = ('id',)
+
+    def get_total_count(self):
+        """An optional (possibly approximate) number of rows, None to leave it out"""
+
+        return None
+
+    def keyset_values(self, obj):
+        return [str(v) if v is not None and not isinstance(v, (int, float, str)) else v
+                for v in (getattr(obj, field) for field in self.keyset_ordering)]
+
+    def seek(self, values, forward):
+        """The filter selecting rows after (or before) the row with the given keyset values"""
+
+        lookup = 'gt' if forward else 'lt'
+        condition = Q()
+        for i, field in enumerate(self.keyset_ordering):
+            step = Q(**{'%s__%s' % (field, lookup): values[i]})
+            for previous, value in zip(self.keyset_ordering[:i], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def paginate_queryset(self, queryset, page_size):
+        after = decode_cursor(self.request.GET.get('after', ''))
+        before = decode_cursor(self.request.GET.get('before', ''))
+        ordering = list(self.keyset_ordering)
+        if before is not None and len(before) == len(ordering):
+            queryset = queryset.filter(self.seek(before, forward=False)).order_by(*['-' + f for f in ordering])
+            rows = list(queryset[:page_size + 1])
+            more_before = len(rows) > page_size
+            rows = rows[:page_size][::-1]
+            more_after = True
+        else:
+            if after is not None and len(after) == len(ordering):
+                queryset = queryset.filter(self.seek(after, forward=True))
+            else:
+                after = None
+            rows = list(queryset.order_by(*ordering)[:page_size + 1])
+            more_after = len(rows) > page_size
+            rows = rows[:page_size]
+            more_before = after is not None
+
+        page = KeysetPage(
+            rows,
+            next_cursor=encode_cursor(self.keyset_values(rows[-1])) if rows and more_after else None,
+            previous_cursor=encode_cursor(self.keyset_values(rows[0])) if rows and more_before else None,
+            total_count=self.get_total_count(),
+        )
+        return None, page, rows, page.has_other_pages()
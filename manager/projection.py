@@ -0,0 +1,125 @@
+import datetime
+
+import numpy as np
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from manager.models import Lease
+
+CHUNK_SIZE = 10000
+
+
+def month_numbers(dates):
+    """Months since January 1970 of dates, NaN where there is no date (None)"""
+
+    days = np.array(dates, dtype='datetime64[D]')
+    months = days.astype('datetime64[M]').astype(float)
+    months[np.isnat(days)] = np.nan
+    return months
+
+
+def add_months(date, months):
+    number = date.year * 12 + date.month - 1 + months
+    return datetime.date(number // 12, number % 12 + 1, 1)
+
+
+class Projection(object):
+    """
+        Monthly rent and recoveries of an organisation's active leases over `years` years from `start`.
+        Rent is escalated by the lease's escalation percentage at each anniversary of its annual rent review
+        after the first projected month; monthly_rent_amount is taken to be the rent currently charged.
+        Amounts are computed in floating point and rounded to cents when reported.
+    """
+
+    def __init__(self, organisation, years=10, start=None):
+        self.organisation = organisation
+        self.years = years
+        self.start = (start or timezone.localdate()).replace(day=1)
+        self.months = years * 12
+        self.lease_count = 0
+        self.rent = np.zeros(self.months)
+        self.recoveries = np.zeros(self.months)
+        self.properties = {}
+        self.property_rent = np.zeros((0, years))
+
+    def leases(self):
+        """
+            Leases still running at the start of the projection. Amounts come back as floats, converting every
+            value to a Decimal would cost more than the projection itself. Dates are fetched as dates rather than
+            text, whose format depends on the database's settings (DateStyle on Postgres).
+        """
+
+        return Lease.objects.filter(
+            Q(lease_ends__isnull=True) | Q(lease_ends__gte=self.start) | Q(lease_indefinite_thereafter=True),
+            organization_managing=self.organisation, is_active=True
+        ).annotate(
+            property_id=F('tenant_lessee__property_id'), rent=Cast('monthly_rent_amount', FloatField()),
+            escalation=Cast('escalation_percentage', FloatField()),
+            recovery=Cast('monthly_recovery_amount', FloatField()),
+        ).values_list('property_id', 'lease_starts', 'lease_ends', 'annual_rent_review_date',
+                      'lease_indefinite_thereafter', 'rent', 'escalation', 'recovery')
+
+    def run(self, chunk_size=CHUNK_SIZE):
+        """Projects the leases chunk_size at a time, each chunk in one vectorised pass"""
+
+        origin = (self.start.year - 1970) * 12 + self.start.month - 1
+        chunk = []
+        for row in self.leases().iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                self.project(chunk, origin)
+                chunk = []
+        if chunk:
+            self.project(chunk, origin)
+        return self
+
+    def project(self, rows, origin):
+        columns = list(zip(*rows))
+        property_ids = columns[0]
+        starts = month_numbers(columns[1]) - origin
+        # Leases without an end date, or running on indefinitely, stay active to the horizon
+        ends = month_numbers(columns[2]) - origin
+        ends[np.isnan(ends) | np.array(columns[4], dtype=bool)] = np.inf
+        reviews = month_numbers(columns[3]) - origin
+        rent = np.array(columns[5], dtype=float)
+        escalation = np.array(columns[6], dtype=float) / 100
+        recoveries = np.array(columns[7], dtype=float)
+
+        month = np.arange(self.months, dtype=float)
+        active = (month >= starts[:, None]) & (month <= ends[:, None])
+        # Anniversaries of the review date that fall after month 0 and on or before each month
+        escalations = np.floor_divide(month - reviews[:, None], 12) - np.floor_divide(-reviews, 12)[:, None]
+        monthly_rent = np.where(active, rent[:, None] * (1 + escalation[:, None]) ** escalations, 0)
+
+        self.lease_count += len(rows)
+        self.rent += monthly_rent.sum(axis=0)
+        self.recoveries += (active * recoveries[:, None]).sum(axis=0)
+
+        rows_by_property = np.array([
+            self.properties.setdefault(property_id, len(self.properties)) for property_id in property_ids
+        ])
+        added = len(self.properties) - len(self.property_rent)
+        if added:
+            self.property_rent = np.vstack([self.property_rent, np.zeros((added, self.years))])
+        np.add.at(self.property_rent, rows_by_property, monthly_rent.reshape(len(rows), self.years, 12).sum(axis=2))
+
+    def monthly(self):
+        """(first day of month, rent, recoveries) for every projected month"""
+
+        return [(add_months(self.start, i), round(float(self.rent[i]), 2), round(float(self.recoveries[i]), 2))
+                for i in range(self.months)]
+
+    def annual(self):
+        """(first day of projection year, rent, recoveries, total) for every projected year"""
+
+        rent = self.rent.reshape(self.years, 12).sum(axis=1)
+        recoveries = self.recoveries.reshape(self.years, 12).sum(axis=1)
+        return [(add_months(self.start, 12 * i), round(float(rent[i]), 2), round(float(recoveries[i]), 2),
+                 round(float(rent[i] + recoveries[i]), 2)) for i in range(self.years)]
+
+    def by_property(self):
+        """{property id: [rent per projected year]}"""
+
+        return {property_id: [round(float(amount), 2) for amount in self.property_rent[index]]
+                for property_id, index in self.properties.items()}
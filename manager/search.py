@@ -0,0 +1,39 @@
+import math
+import re
+
+MIN_TRIGRAM_MATCH = 0.6
+
+
+def normalise(text):
+    """Lower case words with punctuation dropped, so `jane@acme.co.zw` is found by `acme`"""
+
+    return ' '.join(re.sub(r'[^\w\s]|_', ' ', (text or '').lower()).split())
+
+
+def trigrams(text, prefix=False):
+    """
+        Distinct three letter slices of each word, padded like pg_trgm ("  ab", " ab", "ab ").
+        With prefix=True the slice closing the last word is left out, so a partly typed word still matches.
+    """
+
+    words = normalise(text).split()
+    grams = set()
+    for i, word in enumerate(words):
+        padded = '  %s ' % word
+        last = len(padded) - 2
+        if prefix and i == len(words) - 1:
+            last -= 1
+        grams.update(padded[j:j + 3] for j in range(last))
+    return grams
+
+
+def trigram_threshold(grams):
+    """How many of the query's trigrams an entry needs to be a match"""
+
+    return max(1, int(math.ceil(len(grams) * MIN_TRIGRAM_MATCH)))
+
+
+def tsquery(text):
+    """A prefix tsquery matching entries that contain every word of `text`"""
+
+    return ' & '.join('%s:*' % word for word in normalise(text).split())
@@ -0,0 +1,152 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from manager.models import Country, Organisation, User, PropertyManager, LandLord, Property, PropertyUnit, Premise, \
+    Tenant, Lease, LeaseEvent, OrganisationStats, PropertyOccupancy, SearchEntry, occupied_by_lease
+
+CITIES = ['Harare', 'Bulawayo', 'Mutare', 'Gweru', 'Kwekwe', 'Masvingo', 'Chinhoyi', 'Victoria Falls']
+PROPERTY_TYPES = ['Residential', 'Apartment Building', 'Industrial', 'Commercial', 'Retail']
+ACCOMMODATION_TYPES = ['Offices', 'Parking', 'Retail', 'Houses']
+
+
+def ids_after(model, last_id, **filters):
+    """Primary keys of rows inserted after last_id, since bulk_create does not return them on every backend"""
+
+    return list(model.objects.filter(pk__gt=last_id, **filters).order_by('pk').values_list('pk', flat=True))
+
+
+def last_id(model):
+    return model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def seed_organisation(number, country, password, landlords=50, properties_per_landlord=2, units_per_property=4,
+                      premises_per_property=6, occupancy=0.8, batch_size=None, rng=random):
+    """
+        Creates one management company with a manager and a portfolio in realistic proportions:
+        every landlord owns a few properties, each split into units and premises, most of them let.
+    """
+
+    today = timezone.localdate()
+    with transaction.atomic():
+        organisation = Organisation.objects.create(
+            company_name='Benchmark Estates %s' % number, address='%s Samora Machel Ave' % number,
+            city=rng.choice(CITIES), country=country, phone='+263 4 %06d' % number
+        )
+        user = User.objects.create(email='manager%s@benchmark.ekpm' % number, password=password)
+        manager = PropertyManager.objects.create(user=user, organisation=organisation)
+
+        start = last_id(LandLord)
+        LandLord.objects.bulk_create([
+            LandLord(name='LandLord %s-%s' % (number, i), phone='+263 77 %07d' % i, address='%s Jason Moyo St' % i,
+                     city=rng.choice(CITIES), country=country, identification_type='National ID',
+                     identification='63-%06d-X-%02d' % (i, number % 100), nationality=country, bank='CBZ',
+                     bank_branch='Kopje', bank_account_number='%012d' % i, managed_by=organisation)
+            for i in range(landlords)
+        ], batch_size=batch_size)
+        landlord_ids = ids_after(LandLord, start, managed_by=organisation)
+
+        start = last_id(Property)
+        Property.objects.bulk_create([
+            Property(property_type=rng.choice(PROPERTY_TYPES), organisation_managing=organisation,
+                     land_lord_id=landlord_id, title='Property %s-%s-%s' % (number, landlord_id, j),
+                     property_value=Decimal(rng.randint(50, 5000) * 1000), address='%s Nelson Mandela Ave' % j,
+                     city=rng.choice(CITIES), country=country, description='Benchmark property')
+            for landlord_id in landlord_ids for j in range(properties_per_landlord)
+        ], batch_size=batch_size)
+        property_ids = ids_after(Property, start, organisation_managing=organisation)
+
+        start = last_id(PropertyUnit)
+        PropertyUnit.objects.bulk_create([
+            PropertyUnit(property_id=property_id, unit_title='Unit %s' % k, total_area=Decimal(rng.randint(20, 400)))
+            for property_id in property_ids for k in range(units_per_property)
+        ], batch_size=batch_size)
+        units = list(PropertyUnit.objects.filter(pk__gt=start, property__organisation_managing=organisation)
+                     .order_by('pk').values_list('pk', 'property_id'))
+
+        start = last_id(Premise)
+        Premise.objects.bulk_create([
+            Premise(property_id=property_id, premise_title='Premise %s' % k,
+                    accommodation_type=rng.choice(ACCOMMODATION_TYPES), total_area=Decimal(rng.randint(20, 800)))
+            for property_id in property_ids for k in range(premises_per_property)
+        ], batch_size=batch_size)
+        premises = list(Premise.objects.filter(pk__gt=start, property__organisation_managing=organisation)
+                        .order_by('pk').values_list('pk', 'property_id'))
+
+        # One tenant per let space, half of the leases on units and half on premises
+        let_units = [unit for unit in units if rng.random() < occupancy]
+        let_premises = [premise for premise in premises if rng.random() < occupancy]
+        spaces = [('unit', pk, property_id) for pk, property_id in let_units] + \
+                 [('premise', pk, property_id) for pk, property_id in let_premises]
+
+        start = last_id(Tenant)
+        Tenant.objects.bulk_create([
+            Tenant(tenant_name='Tenant %s-%s' % (number, i), trading_as_list_name='Trading %s-%s' % (number, i),
+                   property_id=property_id, identification_type='Company Tax Clearance',
+                   identification='TC%08d' % i, email_1='tenant%s.%s@benchmark.ekpm' % (number, i),
+                   phone_1='+263 71 %07d' % i, postal_address='P.O. Box %s' % i, nationality=country)
+            for i, (kind, space_id, property_id) in enumerate(spaces)
+        ], batch_size=batch_size)
+        tenant_ids = ids_after(Tenant, start, property__organisation_managing=organisation)
+        owners = dict(Property.objects.filter(organisation_managing=organisation).values_list('pk', 'land_lord_id'))
+
+        start = last_id(Lease)
+        leases = []
+        for tenant_id, (kind, space_id, property_id) in zip(tenant_ids, spaces):
+            lease_starts = today - datetime.timedelta(days=rng.randint(0, 5 * 365))
+            leases.append(Lease(
+                tenant_lessee_id=tenant_id, owner_lessor_id=owners[property_id], organization_managing=organisation,
+                created_by_manager=manager, premises_id=space_id if kind == 'premise' else None,
+                property_unit_id=space_id if kind == 'unit' else None, lease_starts=lease_starts,
+                occupation_date=lease_starts, lease_ends=lease_starts + datetime.timedelta(days=rng.choice(
+                    [365, 2 * 365, 3 * 365, 5 * 365])),
+                rent_review_date=lease_starts + datetime.timedelta(days=365),
+                annual_rent_review_date=lease_starts + datetime.timedelta(days=365),
+                monthly_rent_amount=Decimal(rng.randint(200, 20000)), escalation_percentage=Decimal(rng.choice(
+                    [0, 3, 5, 7, 10])), monthly_recovery_amount=Decimal(rng.randint(0, 500)),
+                late_payment_interest_percentage=Decimal(rng.choice([0, 5, 10]))
+            ))
+        Lease.objects.bulk_create(leases, batch_size=batch_size)
+
+        # Bulk inserts skip the signals that link tenants to leases and keep vacancy and stats current
+        lease_tenants = Lease.objects.filter(pk__gt=start, organization_managing=organisation) \
+            .values_list('pk', 'tenant_lessee_id')
+        Tenant.objects.bulk_update([Tenant(pk=tenant_id, lease_id=lease_id) for lease_id, tenant_id in lease_tenants],
+                                   ['lease'], batch_size=batch_size)
+        LeaseEvent.objects.rebuild(Lease.objects.filter(pk__gt=start, organization_managing=organisation))
+        # Let as the app derives it (refresh_vacancy): spaces of leases that have already ended stay vacant
+        for model in (PropertyUnit, Premise):
+            model.objects.filter(
+                property__organisation_managing=organisation, pk__in=model.objects.filter(
+                    occupied_by_lease(today)).values('pk')
+            ).update(is_vacant=False)
+        OrganisationStats.objects.rebuild([organisation.pk])
+        PropertyOccupancy.objects.rebuild(Property.objects.filter(organisation_managing=organisation))
+        SearchEntry.objects.rebuild([organisation.pk])
+
+    return organisation
+
+
+def last_number():
+    """The highest N among the benchmark managers' manager<N>@benchmark.ekpm logins, 0 before any seeding"""
+
+    emails = User.objects.filter(email__startswith='manager', email__endswith='@benchmark.ekpm') \
+        .values_list('email', flat=True)
+    numbers = [email[len('manager'):-len('@benchmark.ekpm')] for email in emails]
+    return max((int(number) for number in numbers if number.isdigit()), default=0)
+
+
+def seed(organisations, password='benchmark', seed=None, **sizes):
+    """Seeds several organisations, one transaction each so memory stays flat"""
+
+    rng = random.Random(seed)
+    country, created = Country.objects.get_or_create(code='ZW', defaults={'name': 'Zimbabwe'})
+    password = make_password(password)
+    # Numbered after the existing managers rather than the organisation count, which drops on deletions
+    first = last_number() + 1
+    return [seed_organisation(number, country, password, rng=rng, **sizes)
+            for number in range(first, first + organisations)]
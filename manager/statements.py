@@ -0,0 +1,165 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.db import connections
+from django.db.models import Sum
+from django.db.models.functions import Greatest
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from manager.billing import cents
+from manager.models import Allocation, LandLord, LedgerEntry, ZERO, month_end
+
+try:
+    import weasyprint
+except ImportError:  # PDF statements need the weasyprint package, HTML ones do not
+    weasyprint = None
+
+CHUNK_SIZE = 200
+FORMATS = ['html', 'pdf']
+# Collections on these charges are the landlord's rent, a management fee is taken on them
+RENT_KINDS = [LedgerEntry.RENT, LedgerEntry.RATES, LedgerEntry.INTEREST]
+STATEMENT_FIELDS = ['name', 'address', 'city', 'bank', 'bank_branch', 'bank_account_number',
+                    'management_fee_percentage', 'managed_by__company_name']
+
+
+class Statement(object):
+    """What was collected for a landlord in a month, lease by lease, and what is paid out to them"""
+
+    def __init__(self, landlord, period):
+        self.landlord = landlord
+        self.period = period
+        self.leases = {}
+        self.arrears = ZERO
+
+    def collected(self, lease_id, tenant, property_title, kind, amount):
+        line = self.leases.get(lease_id)
+        if line is None:
+            line = self.leases[lease_id] = {'tenant': tenant, 'property': property_title, 'rent': ZERO,
+                                            'recoveries': ZERO}
+        line['rent' if kind in RENT_KINDS else 'recoveries'] += amount
+
+    @property
+    def lines(self):
+        return sorted(self.leases.values(), key=lambda line: (line['property'], line['tenant']))
+
+    @property
+    def rent(self):
+        return sum((line['rent'] for line in self.leases.values()), ZERO)
+
+    @property
+    def recoveries(self):
+        return sum((line['recoveries'] for line in self.leases.values()), ZERO)
+
+    @property
+    def fees(self):
+        return cents(self.rent * self.landlord.management_fee_percentage / 100)
+
+    @property
+    def net(self):
+        return self.rent + self.recoveries - self.fees
+
+
+def build_statements(landlord_ids, period):
+    """
+        Statements of the given landlords for the month starting `period`. A payment counts as collected in
+        the month it settles a charge: on the payment date, or on the charge date for payments made in advance.
+        Arrears are the charges still unpaid at the end of the month, so past statements do not change.
+    """
+
+    statements = {
+        landlord.pk: Statement(landlord, period)
+        for landlord in LandLord.objects.filter(pk__in=landlord_ids).select_related('managed_by')
+        .only(*STATEMENT_FIELDS).order_by('pk')
+    }
+    collected = Allocation.objects.annotate(
+        collected_on=Greatest('payment__date', 'charge__date')
+    ).filter(
+        charge__lease__owner_lessor__in=landlord_ids, collected_on__range=(period, month_end(period))
+    ).values_list(
+        'charge__lease__owner_lessor', 'charge__lease', 'charge__lease__tenant_lessee__tenant_name',
+        'charge__lease__tenant_lessee__property__title', 'charge__kind'
+    ).annotate(amount=Sum('amount')).order_by()
+    for landlord_id, lease_id, tenant, property_title, kind, amount in collected:
+        statements[landlord_id].collected(lease_id, tenant, property_title, kind, amount)
+
+    period_end = month_end(period)
+    charged = LedgerEntry.objects.filter(
+        lease__owner_lessor__in=landlord_ids, kind__in=LedgerEntry.CHARGES, date__lte=period_end
+    ).values_list('lease__owner_lessor').annotate(amount=Sum('amount')).order_by()
+    for landlord_id, amount in charged:
+        statements[landlord_id].arrears += amount
+    settled = Allocation.objects.filter(
+        charge__lease__owner_lessor__in=landlord_ids, charge__date__lte=period_end, payment__date__lte=period_end
+    ).values_list('charge__lease__owner_lessor').annotate(amount=Sum('amount')).order_by()
+    for landlord_id, amount in settled:
+        statements[landlord_id].arrears -= amount
+    return list(statements.values())
+
+
+def statement_path(directory, statement, fmt):
+    return os.path.join(directory, '%s' % statement.landlord.managed_by_id, statement.period.strftime('%Y-%m'),
+                        'landlord-%s.%s' % (statement.landlord.pk, fmt))
+
+
+def write_statement(statement, directory, fmt='html'):
+    """Renders a statement to a file under directory/<organisation>/<YYYY-MM>/, returns its path"""
+
+    html = render_to_string('manager/owner_statement.html', {
+        'statement': statement, 'landlord': statement.landlord, 'organisation': statement.landlord.managed_by,
+        'period_end': month_end(statement.period), 'generated': timezone.now(),
+    })
+    path = statement_path(directory, statement, fmt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == 'pdf':
+        weasyprint.HTML(string=html).write_pdf(path)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+    return path
+
+
+def generate_chunk(landlord_ids, period, directory, fmt='html'):
+    """Builds and writes the statements of one chunk of landlords, the unit of work of a pool worker"""
+
+    return [(statement.landlord.pk, statement.net, write_statement(statement, directory, fmt))
+            for statement in build_statements(landlord_ids, period)]
+
+
+def init_worker():
+    # Workers started with spawn or forkserver import the project afresh
+    if not apps.ready:
+        django.setup()
+
+
+def close_connections():
+    """Disconnects this process's connections, pooled ones included (see ekpm.db.pooled)"""
+
+    for connection in connections.all():
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+
+
+def generate(organisation, period, directory, fmt='html', workers=None, chunk_size=CHUNK_SIZE):
+    """
+        Writes the month's statement of every active landlord of an organisation, chunk_size landlords per
+        task spread over `workers` processes (one per CPU when None, in this process when 1).
+        Returns (landlord id, net payout, path) for each statement.
+    """
+
+    period = period.replace(day=1)
+    landlord_ids = list(LandLord.objects.filter(managed_by=organisation, is_active=True).order_by('pk')
+                        .values_list('pk', flat=True))
+    chunks = [landlord_ids[i:i + chunk_size] for i in range(0, len(landlord_ids), chunk_size)]
+    if workers == 1 or len(chunks) < 2:
+        return [row for chunk in chunks for row in generate_chunk(chunk, period, directory, fmt)]
+
+    # Forked workers must open their own connections rather than share the parent's
+    close_connections()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        results = pool.map(generate_chunk, chunks, [period] * len(chunks), [directory] * len(chunks),
+                           [fmt] * len(chunks))
+        return [row for rows in results for row in rows]
@@ -6,6 +6,14 @@ app_name = 'manager'
 urlpatterns = [
     # LandLords
     path('', views.PortalHomeView.as_view(), name='portal'),
+    path('calendar/', views.LeaseCalendarView.as_view(), name='lease_calendar'),
+    path('calendar/events/', views.LeaseEventFeedView.as_view(), name='lease_events'),
+    path('rent-projection/', views.RentProjectionView.as_view(), name='rent_projection'),
+    path('arrears/', views.ArrearsReportView.as_view(), name='arrears_report'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('search.json', views.SearchJsonView.as_view(), name='search_json'),
+    path('autocomplete/<slug:kind>.json', views.AutocompleteView.as_view(), name='autocomplete'),
+    path('export/<slug:kind>.csv', views.PortfolioExportView.as_view(), name='export'),
     path('landlords/', views.LandLordListView.as_view(), name='landlords'),
     path('landlords/new/', views.LandLordCreateView.as_view(), name='landlords_new'),
     path('landlords/<int:pk>/', views.LandLordDetailView.as_view(), name='landlord_detail'),
@@ -13,6 +21,8 @@ urlpatterns = [
     # Properties
     path('properties/', views.PropertyListView.as_view(), name='properties'),
     path('properties/new/', views.PropertyCreateView.as_view(), name='properties_new'),
+    path('properties/vacancy/', views.VacancyReportView.as_view(), name='vacancy_report'),
+    path('properties/nearby/', views.PropertyNearbyView.as_view(), name='properties_nearby'),
     path('properties/<int:pk>/', views.PropertyDetailView.as_view(), name='property_detail'),
     path('properties/<int:pk>/update/', views.PropertyUpdateView.as_view(), name='property_update'),
     # Property Units
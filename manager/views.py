@@ -1,12 +1,25 @@
+import datetime
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.core.cache import cache
+from django.db.models import F, Max, Sum
+from django.http import Http404, HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.utils.decorators import method_decorator
-from django.views.generic import TemplateView, CreateView, ListView, DetailView, UpdateView
+from django.views.generic import View, TemplateView, CreateView, ListView, DetailView, UpdateView
 
+from ekpm.db.routers import pin_primary, primary_pinned, replica_reads
+from manager.autocomplete import LOOKUPS, autocomplete
+from manager.exporting import EXPORTS, export_csv
 from manager.forms import LandLordForm, PropertyForm, PropertyUnitForm, PremiseForm, TenantForm, LeaseForm
-from manager.models import LandLord, PropertyManager, Property, PropertyUnit, Premise, Tenant, Lease
+from manager.models import LandLord, PropertyManager, Property, PropertyUnit, Premise, Tenant, Lease, LeaseEvent, \
+    OrganisationStats, PropertyOccupancy, SearchEntry, ArrearsAgeing, detail_version
+from manager.pagination import KeysetPaginationMixin
+from manager.projection import Projection
 
 
 class LoginRequiredMixin(object):
@@ -15,123 +28,378 @@ class LoginRequiredMixin(object):
         return super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
 
 
-class PortalHomeView(LoginRequiredMixin, TemplateView):
+class CachedDetailMixin(object):
+    """
+        Serves a detail page from the cache until the object's version changes (see retire_detail_pages).
+        Pages are cached per organisation and user, the top bar shows the user's name.
+    """
+
+    def get_page_cache_key(self):
+        request = self.request
+        version = detail_version(self.model, self.kwargs['pk'])
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return 'detail_page:%s:%s:%s:%s' % (request.organisation.pk, request.user.pk, path, version)
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_page_cache_key()
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super(CachedDetailMixin, self).get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda rendered: cache.set(key, rendered.content, settings.DETAIL_PAGE_CACHE_TIMEOUT)
+        )
+        return response
+
+
+class ReplicaMixin(object):
+    """
+        Reads for the view's `replica_methods` requests go to the read replica (see ekpm/db/routers.py), other
+        requests use the primary and keep the user's reads there for a few seconds, so they see their own
+        changes. Cached detail pages are rendered from the primary, a stale page would be cached for minutes.
+    """
+    replica_methods = ['GET', 'HEAD']
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.replica_methods:
+            response = super(ReplicaMixin, self).dispatch(request, *args, **kwargs)
+            return response if request.method in ('GET', 'HEAD', 'OPTIONS') else pin_primary(response)
+        if primary_pinned(request):
+            return super(ReplicaMixin, self).dispatch(request, *args, **kwargs)
+
+        with replica_reads():
+            response = super(ReplicaMixin, self).dispatch(request, *args, **kwargs)
+            # Templates run their queries as they render
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
+class PinPrimaryMixin(ReplicaMixin):
+    """Create and update views: forms are filled in from the primary, a stale copy would undo recent changes"""
+    replica_methods = []
+
+
+class SearchView(LoginRequiredMixin, ReplicaMixin, TemplateView):
+    """Landlords, properties and tenants of the organisation matching ?q=, optionally only one ?kind="""
+    template_name = 'manager/search.html'
+    limit = 50
+
+    def get_results(self):
+        kind = self.request.GET.get('kind')
+        return SearchEntry.objects.search(self.request.organisation, self.request.GET.get('q', ''),
+                                          kinds=[kind] if kind else None, limit=self.limit)
+
+    def get_context_data(self, **kwargs):
+        context = super(SearchView, self).get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        context['results'] = self.get_results()
+        return context
+
+
+class SearchJsonView(SearchView):
+    limit = 20
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'results': [{
+            'kind': entry.kind,
+            'id': entry.object_id,
+            'title': entry.title,
+            'detail': entry.detail,
+            'url': entry.url,
+        } for entry in self.get_results()]})
+
+
+class AutocompleteView(LoginRequiredMixin, ReplicaMixin, View):
+    """Options of a lazy select whose label starts with ?q=, premises and units also need ?property="""
+
+    def get(self, request, *args, **kwargs):
+        kind = kwargs['kind']
+        if kind not in LOOKUPS:
+            raise Http404
+        property_id = None
+        if LOOKUPS[kind][1]:
+            try:
+                property_id = int(request.GET['property'])
+            except (KeyError, ValueError):
+                return HttpResponseBadRequest('Provide the property id')
+        options = autocomplete(kind, request.organisation, request.GET.get('q', ''), property_id)
+        return JsonResponse({'results': [{'id': pk, 'text': label} for pk, label in options]})
+
+
+class PortalHomeView(LoginRequiredMixin, ReplicaMixin, TemplateView):
     template_name = 'manager/index.html'
 
     def get_context_data(self, **kwargs):
         context = super(PortalHomeView, self).get_context_data(**kwargs)
-        context['tenants_count'] = Tenant.objects.all().count()
-        context['portfolios'] = LandLord.objects.all().count()
-        context['managers'] = PropertyManager.objects.filter(
-            organisation=PropertyManager.objects.get(user=self.request.user).organisation).count()
+        context['stats'] = OrganisationStats.objects.for_organisation(self.request.organisation)
+        context['tenants_count'] = context['stats'].tenants
+        context['portfolios'] = context['stats'].landlords
+        context['managers'] = PropertyManager.objects.filter(organisation=self.request.organisation).count()
         return context
 
 
-class LandLordCreateView(LoginRequiredMixin, CreateView):
+class LandLordCreateView(LoginRequiredMixin, PinPrimaryMixin, CreateView):
     form_class = LandLordForm
     template_name = 'manager/landlords_create.html'
 
     def form_valid(self, form):
-        form.instance.managed_by = PropertyManager.objects.get(
-            user=self.request.user
-        ).organisation
+        form.instance.managed_by_id = self.request.organisation.pk
         return super(LandLordCreateView, self).form_valid(form)
 
 
-class LandLordListView(LoginRequiredMixin, ListView):
+class LandLordListView(LoginRequiredMixin, ReplicaMixin, KeysetPaginationMixin, ListView):
     model = LandLord
     paginate_by = 10
     template_name = 'manager/landlords_list.html'
+    context_object_name = 'landlords'
 
-    def get_context_data(self, **kwargs):
-        context = super(LandLordListView, self).get_context_data(**kwargs)
-        landlords = LandLord.objects.filter(
-            managed_by=PropertyManager.objects.get(
-                user=self.request.user).organisation,
+    def get_queryset(self, *args, **kwargs):
+        query = super(LandLordListView, self).get_queryset().filter(
+            managed_by=self.request.organisation,
             is_active=True
         )
-        paginator = Paginator(landlords, self.paginate_by)
-        page = self.request.GET.get('page')
-        try:
-            pages = paginator.page(page)
-        except PageNotAnInteger:
-            pages = paginator.page(1)
-        except EmptyPage:
-            pages = paginator.page(paginator.num_pages)
-        context['landlords'] = pages
-        return context
+        return query
+
+    def get_total_count(self):
+        return OrganisationStats.objects.for_organisation(self.request.organisation).landlords
 
 
-class LandLordDetailView(LoginRequiredMixin, DetailView):
+class LandLordDetailView(LoginRequiredMixin, CachedDetailMixin, DetailView):
     model = LandLord
     context_object_name = 'landlord'
     template_name = 'manager/landlords_detail.html'
 
 
-class LandLordUpdateView(LoginRequiredMixin, UpdateView):
+class LandLordUpdateView(LoginRequiredMixin, PinPrimaryMixin, UpdateView):
     form_class = LandLordForm
     template_name = 'manager/landlords_create.html'
     model = LandLord
 
 
-class PropertyCreateView(LoginRequiredMixin, CreateView):
+class PropertyCreateView(LoginRequiredMixin, PinPrimaryMixin, CreateView):
     form_class = PropertyForm
     template_name = 'manager/property_create.html'
 
     def get_form_kwargs(self):
         kwargs = super(PropertyCreateView, self).get_form_kwargs()
-        kwargs.update({'user': self.request.user})
+        kwargs.update({'organisation': self.request.organisation})
         return kwargs
 
     def form_valid(self, form):
-        form.instance.organisation_managing = PropertyManager.objects.get(
-            user=self.request.user
-        ).organisation
+        form.instance.organisation_managing_id = self.request.organisation.pk
         return super(PropertyCreateView, self).form_valid(form)
 
 
-class PropertyListView(LoginRequiredMixin, ListView):
+class PropertyListView(LoginRequiredMixin, ReplicaMixin, KeysetPaginationMixin, ListView):
     model = Property
     paginate_by = 10
     template_name = 'manager/property_list.html'
+    context_object_name = 'properties'
+
+    def get_queryset(self, *args, **kwargs):
+        query = super(PropertyListView, self).get_queryset().filter(
+            organisation_managing=self.request.organisation,
+            is_active=True
+        ).select_related('land_lord')
+        return query
+
+    def get_total_count(self):
+        return OrganisationStats.objects.for_organisation(self.request.organisation).properties
+
+
+class VacancyReportView(LoginRequiredMixin, ReplicaMixin, KeysetPaginationMixin, ListView):
+    """Occupancy of every property, read from the PropertyOccupancy rows rather than counted per request"""
+    model = Property
+    paginate_by = 25
+    template_name = 'manager/vacancy_report.html'
+    context_object_name = 'properties'
+
+    def get_queryset(self, *args, **kwargs):
+        return super(VacancyReportView, self).get_queryset().filter(
+            organisation_managing=self.request.organisation,
+            is_active=True
+        ).select_related('occupancy')
+
+    def get_total_count(self):
+        return OrganisationStats.objects.for_organisation(self.request.organisation).properties
 
     def get_context_data(self, **kwargs):
-        context = super(PropertyListView, self).get_context_data(**kwargs)
+        context = super(VacancyReportView, self).get_context_data(**kwargs)
+        missing = [p.pk for p in context['properties'] if not hasattr(p, 'occupancy')]
+        if missing:
+            PropertyOccupancy.objects.recount(Property.objects.filter(pk__in=missing))
+            built = PropertyOccupancy.objects.in_bulk(missing, field_name='property_id')
+            for property_obj in context['properties']:
+                if property_obj.pk in built:
+                    property_obj.occupancy = built[property_obj.pk]
+        context['stats'] = OrganisationStats.objects.for_organisation(self.request.organisation)
+        return context
+
+
+class PropertyNearbyView(LoginRequiredMixin, ReplicaMixin, View):
+    """
+        Geocoded properties as JSON, either inside ?bbox=south,west,north,east
+        or within ?radius= km (default 5) of ?lat=&lng=, nearest first
+    """
+    max_results = 500
+
+    def get(self, request, *args, **kwargs):
         properties = Property.objects.filter(
-            organisation_managing=PropertyManager.objects.get(
-                user=self.request.user).organisation,
+            organisation_managing=request.organisation,
             is_active=True
-        )
-        paginator = Paginator(properties, self.paginate_by)
-        page = self.request.GET.get('page')
+        ).only('id', 'title', 'address', 'city', 'latitude', 'longitude')
+        try:
+            if 'bbox' in request.GET:
+                south, west, north, east = [float(v) for v in request.GET['bbox'].split(',')]
+                properties = properties.within_bbox(south, west, north, east)[:self.max_results]
+            else:
+                properties = properties.within_radius(
+                    float(request.GET['lat']), float(request.GET['lng']), float(request.GET.get('radius', 5))
+                )[:self.max_results]
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('Provide bbox=south,west,north,east or lat, lng and radius')
+
+        return JsonResponse({'properties': [{
+            'id': p.pk,
+            'title': p.title,
+            'address': p.address,
+            'city': p.city,
+            'latitude': p.latitude,
+            'longitude': p.longitude,
+            'distance_km': getattr(p, 'distance_km', None),
+            'url': str(p.get_absolute_url()),
+        } for p in properties]})
+
+
+class PortfolioExportView(LoginRequiredMixin, View):
+    """Streams the organisation's properties, tenants, leases or rent roll as a CSV download"""
+
+    def get(self, request, *args, **kwargs):
+        kind = kwargs['kind']
+        if kind not in EXPORTS:
+            raise Http404('No %s export' % kind)
+        response = StreamingHttpResponse(export_csv(kind, request.organisation), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="%s-%s.csv"' % (
+            kind, timezone.now().strftime('%Y%m%d'))
+        return response
+
+
+class RentProjectionView(LoginRequiredMixin, ReplicaMixin, TemplateView):
+    """Projected rent and recoveries of the organisation's active leases, ?years= ahead (10 by default)"""
+    template_name = 'manager/rent_projection.html'
+    max_years = 30
+
+    def get_context_data(self, **kwargs):
+        context = super(RentProjectionView, self).get_context_data(**kwargs)
         try:
-            pages = paginator.page(page)
-        except PageNotAnInteger:
-            pages = paginator.page(1)
-        except EmptyPage:
-            pages = paginator.page(paginator.num_pages)
-        context['properties'] = pages
+            years = min(max(int(self.request.GET.get('years', 10)), 1), self.max_years)
+        except ValueError:
+            years = 10
+        projection = Projection(self.request.organisation, years=years).run()
+        titles = dict(Property.objects.filter(pk__in=list(projection.properties)).values_list('pk', 'title'))
+        context['projection'] = projection
+        context['annual'] = projection.annual()
+        context['properties'] = sorted(
+            [(titles[pk], amounts) for pk, amounts in projection.by_property().items()], key=lambda row: row[0]
+        )
+        return context
+
+
+class ArrearsReportView(LoginRequiredMixin, ReplicaMixin, TemplateView):
+    """Unpaid charges by age per ?by=tenant, property (the default) or landlord, summed from the ArrearsAgeing rows"""
+    template_name = 'manager/arrears_report.html'
+    groups = {
+        'tenant': ('tenant', 'tenant__tenant_name'),
+        'property': ('property', 'property__title'),
+        'landlord': ('landlord', 'landlord__name'),
+    }
+
+    def get_context_data(self, **kwargs):
+        context = super(ArrearsReportView, self).get_context_data(**kwargs)
+        by = self.request.GET.get('by')
+        if by not in self.groups:
+            by = 'property'
+        key, name = self.groups[by]
+        sums = {bucket: Sum(bucket) for bucket in ArrearsAgeing.BUCKETS + ['total']}
+        ageing = ArrearsAgeing.objects.filter(organisation=self.request.organisation)
+        context['by'] = by
+        # Grouped by id as well, so namesakes get a row each
+        context['rows'] = ageing.values(key, label=F(name)).annotate(**sums).order_by('-total', 'label', key)
+        context['totals'] = ageing.aggregate(as_of=Max('as_of'), **sums)
         return context
 
 
-class PropertyDetailView(LoginRequiredMixin, DetailView):
+class LeaseCalendarView(LoginRequiredMixin, ReplicaMixin, TemplateView):
+    """Calendar of lease events with a list of those in the next `upcoming_days` days"""
+    template_name = 'manager/lease_calendar.html'
+    upcoming_days = 90
+    max_upcoming = 200
+
+    def get_context_data(self, **kwargs):
+        context = super(LeaseCalendarView, self).get_context_data(**kwargs)
+        today = timezone.localdate()
+        context['upcoming_days'] = self.upcoming_days
+        context['upcoming'] = LeaseEvent.objects.filter(
+            organisation=self.request.organisation,
+            date__range=(today, today + datetime.timedelta(days=self.upcoming_days))
+        ).select_related('lease__tenant_lessee').order_by('date', 'id')[:self.max_upcoming]
+        return context
+
+
+class LeaseEventFeedView(LoginRequiredMixin, ReplicaMixin, View):
+    """Lease events between ?start= and ?end= (ISO dates) as the JSON event feed the calendar widget reads"""
+    max_days = 400
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start = datetime.datetime.strptime(request.GET['start'][:10], '%Y-%m-%d').date()
+            end = datetime.datetime.strptime(request.GET['end'][:10], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('Provide start and end as YYYY-MM-DD')
+        if not start <= end <= start + datetime.timedelta(days=self.max_days):
+            return HttpResponseBadRequest('The range may span at most %s days' % self.max_days)
+
+        events = LeaseEvent.objects.filter(
+            organisation=request.organisation, date__gte=start, date__lt=end
+        ).select_related('lease__tenant_lessee').order_by('date', 'id')
+        return JsonResponse([{
+            'id': event.pk,
+            'title': '%s: %s' % (event.lease.tenant_lessee.tenant_name, event.get_kind_display()),
+            'start': event.date.isoformat(),
+            'allDay': True,
+            'className': 'lease-event-%s' % event.kind,
+            'url': str(event.lease.get_absolute_url()),
+        } for event in events], safe=False)
+
+
+class PropertyDetailView(LoginRequiredMixin, CachedDetailMixin, DetailView):
     model = Property
+    queryset = Property.objects.select_related('land_lord', 'occupancy')
     context_object_name = 'property'
     template_name = 'manager/property_detail.html'
 
+    def get_context_data(self, **kwargs):
+        context = super(PropertyDetailView, self).get_context_data(**kwargs)
+        try:
+            context['occupancy'] = self.object.occupancy
+        except PropertyOccupancy.DoesNotExist:
+            context['occupancy'] = PropertyOccupancy.objects.for_property(self.object)
+        return context
+
 
-class PropertyUpdateView(LoginRequiredMixin, UpdateView):
+class PropertyUpdateView(LoginRequiredMixin, PinPrimaryMixin, UpdateView):
     form_class = PropertyForm
     template_name = 'manager/property_create.html'
     model = Property
 
     def get_form_kwargs(self):
         kwargs = super(PropertyUpdateView, self).get_form_kwargs()
-        kwargs.update({'user': self.request.user})
+        kwargs.update({'organisation': self.request.organisation})
         return kwargs
 
 
-class PropertyUnitListView(LoginRequiredMixin, ListView):
+class PropertyUnitListView(LoginRequiredMixin, ReplicaMixin, KeysetPaginationMixin, ListView):
     model = PropertyUnit
     paginate_by = 10
     template_name = 'manager/property_unit_list.html'
@@ -141,7 +409,7 @@ class PropertyUnitListView(LoginRequiredMixin, ListView):
         query = super(PropertyUnitListView, self).get_queryset().filter(
             property_id=self.kwargs.get('prop'),
             is_active=True
-        ).order_by('id')
+        ).select_related('property').order_by('id')
         return query
 
     def get_context_data(self, **kwargs):
@@ -151,7 +419,7 @@ class PropertyUnitListView(LoginRequiredMixin, ListView):
         return context
 
 
-class PropertyUnitCreateView(LoginRequiredMixin, CreateView):
+class PropertyUnitCreateView(LoginRequiredMixin, PinPrimaryMixin, CreateView):
     form_class = PropertyUnitForm
     template_name = 'manager/property_unit_create.html'
 
@@ -165,8 +433,9 @@ class PropertyUnitCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
-class PropertyUnitDetailView(LoginRequiredMixin, DetailView):
+class PropertyUnitDetailView(LoginRequiredMixin, ReplicaMixin, DetailView):
     model = PropertyUnit
+    queryset = PropertyUnit.objects.select_related('property')
     context_object_name = 'unit'
     template_name = 'manager/property_unit_detail.html'
 
@@ -176,7 +445,7 @@ class PropertyUnitDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
-class PropertyUnitUpdateView(LoginRequiredMixin, UpdateView):
+class PropertyUnitUpdateView(LoginRequiredMixin, PinPrimaryMixin, UpdateView):
     form_class = PropertyUnitForm
     template_name = 'manager/property_unit_create.html'
     model = PropertyUnit
@@ -187,7 +456,7 @@ class PropertyUnitUpdateView(LoginRequiredMixin, UpdateView):
         return context
 
 
-class PropertyPremiseListView(LoginRequiredMixin, ListView):
+class PropertyPremiseListView(LoginRequiredMixin, ReplicaMixin, KeysetPaginationMixin, ListView):
     model = Premise
     paginate_by = 10
     template_name = 'manager/premise_list.html'
@@ -197,7 +466,7 @@ class PropertyPremiseListView(LoginRequiredMixin, ListView):
         query = super(PropertyPremiseListView, self).get_queryset().filter(
             property_id=self.kwargs.get('prop'),
             is_active=True
-        ).order_by('id')
+        ).select_related('property').order_by('id')
         return query
 
     def get_context_data(self, **kwargs):
@@ -207,7 +476,7 @@ class PropertyPremiseListView(LoginRequiredMixin, ListView):
         return context
 
 
-class PropertyPremiseCreateView(LoginRequiredMixin, CreateView):
+class PropertyPremiseCreateView(LoginRequiredMixin, PinPrimaryMixin, CreateView):
     form_class = PremiseForm
     template_name = 'manager/premise_create.html'
 
@@ -221,8 +490,9 @@ class PropertyPremiseCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
-class PropertyPremiseDetailView(LoginRequiredMixin, DetailView):
+class PropertyPremiseDetailView(LoginRequiredMixin, ReplicaMixin, DetailView):
     model = Premise
+    queryset = Premise.objects.select_related('property')
     context_object_name = 'premise'
     template_name = 'manager/premise_detail.html'
 
@@ -232,7 +502,7 @@ class PropertyPremiseDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
-class PropertyPremiseUpdateView(LoginRequiredMixin, UpdateView):
+class PropertyPremiseUpdateView(LoginRequiredMixin, PinPrimaryMixin, UpdateView):
     form_class = PremiseForm
     template_name = 'manager/premise_create.html'
     model = Premise
@@ -243,7 +513,7 @@ class PropertyPremiseUpdateView(LoginRequiredMixin, UpdateView):
         return context
 
 
-class TenantListView(LoginRequiredMixin, ListView):
+class TenantListView(LoginRequiredMixin, ReplicaMixin, KeysetPaginationMixin, ListView):
     model = Tenant
     paginate_by = 10
     template_name = 'manager/tenant_list.html'
@@ -253,7 +523,7 @@ class TenantListView(LoginRequiredMixin, ListView):
         query = super(TenantListView, self).get_queryset().filter(
             property_id=self.kwargs.get('prop'),
             is_active=True
-        ).order_by('id')
+        ).select_related('property').order_by('id')
         return query
 
     def get_context_data(self, **kwargs):
@@ -263,7 +533,7 @@ class TenantListView(LoginRequiredMixin, ListView):
         return context
 
 
-class AllTenantsListView(LoginRequiredMixin, ListView):
+class AllTenantsListView(LoginRequiredMixin, ReplicaMixin, KeysetPaginationMixin, ListView):
     model = Tenant
     paginate_by = 10
     template_name = 'manager/tenant_list_all.html'
@@ -271,16 +541,16 @@ class AllTenantsListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self, *args, **kwargs):
         query = super(AllTenantsListView, self).get_queryset().filter(
-            property__in=Property.objects.filter(
-                organisation_managing=PropertyManager.objects.get(
-                    user=self.request.user).organisation
-            ),
+            property__organisation_managing=self.request.organisation,
             is_active=True
-        ).order_by('id')
+        ).select_related('property').order_by('id')
         return query
 
+    def get_total_count(self):
+        return OrganisationStats.objects.for_organisation(self.request.organisation).tenants
+
 
-class TenantCreateView(LoginRequiredMixin, CreateView):
+class TenantCreateView(LoginRequiredMixin, PinPrimaryMixin, CreateView):
     form_class = TenantForm
     template_name = 'manager/tenant_create.html'
 
@@ -294,8 +564,9 @@ class TenantCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
-class TenantDetailView(LoginRequiredMixin, DetailView):
+class TenantDetailView(LoginRequiredMixin, CachedDetailMixin, DetailView):
     model = Tenant
+    queryset = Tenant.objects.select_related('property', 'lease__tenant_lessee')
     context_object_name = 'tenant'
     template_name = 'manager/tenant_detail.html'
 
@@ -305,7 +576,7 @@ class TenantDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
-class TenantUpdateView(LoginRequiredMixin, UpdateView):
+class TenantUpdateView(LoginRequiredMixin, PinPrimaryMixin, UpdateView):
     form_class = TenantForm
     template_name = 'manager/tenant_create.html'
     model = Tenant
@@ -316,7 +587,7 @@ class TenantUpdateView(LoginRequiredMixin, UpdateView):
         return context
 
 
-class LeaseCreateView(LoginRequiredMixin, CreateView):
+class LeaseCreateView(LoginRequiredMixin, PinPrimaryMixin, CreateView):
     form_class = LeaseForm
     template_name = 'manager/lease_create.html'
 
@@ -328,23 +599,27 @@ class LeaseCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form, **kwargs):
         form.instance.tenant_lessee = Tenant.objects.get(id=self.kwargs.get('ten'))
         form.instance.owner_lessor = Property.objects.get(id=self.kwargs.get('prop')).land_lord
-        form.instance.organization_managing = PropertyManager.objects.get(user=self.request.user).organisation
-        form.instance.created_by_manager = PropertyManager.objects.get(user=self.request.user)
+        # The request's lazy accessors are not model instances, assign their ids
+        form.instance.organization_managing_id = self.request.organisation.pk
+        form.instance.created_by_manager_id = self.request.manager.pk
         return super(LeaseCreateView, self).form_valid(form)
 
     def get_context_data(self, **kwargs):
         context = super(LeaseCreateView, self).get_context_data(**kwargs)
         context['prop'] = self.kwargs.get('prop')
         context['ten'] = self.kwargs.get('ten')
-        context['owner'] = Property.objects.get(id=self.kwargs.get('prop')).land_lord
-        context['property'] = Property.objects.get(id=self.kwargs.get('prop'))
+        context['property'] = Property.objects.select_related('land_lord').get(id=self.kwargs.get('prop'))
+        context['owner'] = context['property'].land_lord
         context['tenant'] = Tenant.objects.get(id=self.kwargs.get('ten'))
 
         return context
 
 
-class LeaseDetailView(LoginRequiredMixin, DetailView):
+class LeaseDetailView(LoginRequiredMixin, CachedDetailMixin, DetailView):
     model = Lease
+    queryset = Lease.objects.select_related(
+        'tenant_lessee', 'owner_lessor', 'created_by_manager__user', 'premises', 'property_unit'
+    )
     context_object_name = 'lease'
     template_name = 'manager/lease_detail.html'
 
@@ -355,7 +630,7 @@ class LeaseDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
-class LeaseUpdateView(LoginRequiredMixin, UpdateView):
+class LeaseUpdateView(LoginRequiredMixin, PinPrimaryMixin, UpdateView):
     form_class = LeaseForm
     template_name = 'manager/lease_create.html'
     model = Lease
@@ -369,7 +644,7 @@ class LeaseUpdateView(LoginRequiredMixin, UpdateView):
         context = super(LeaseUpdateView, self).get_context_data(**kwargs)
         context['prop'] = self.kwargs.get('prop')
         context['ten'] = self.kwargs.get('ten')
-        context['owner'] = Property.objects.get(id=self.kwargs.get('prop')).land_lord
-        context['property'] = Property.objects.get(id=self.kwargs.get('prop'))
+        context['property'] = Property.objects.select_related('land_lord').get(id=self.kwargs.get('prop'))
+        context['owner'] = context['property'].land_lord
         context['tenant'] = Tenant.objects.get(id=self.kwargs.get('ten'))
         return context
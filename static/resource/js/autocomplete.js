@@ -0,0 +1,75 @@
+/*
+ * Lazy selects: a select[data-autocomplete] is rendered with only its chosen option. It is hidden behind a
+ * text box that fetches matching options from the data-autocomplete url ({results: [{id, text}]}) as the
+ * user types; picking one makes it the select's only option so the form posts it as usual.
+ */
+(function ($) {
+    var delay = 200;
+
+    function attach(select) {
+        var $select = $(select).hide(),
+            url = $select.data('autocomplete'),
+            $input = $('<input type="text" autocomplete="off"/>')
+                .addClass('ui-inputfield ui-inputtext ui-widget ui-state-default ui-corner-all')
+                .attr('placeholder', 'Start typing to search')
+                .insertAfter($select),
+            $panel = $('<ul/>')
+                .addClass('ui-autocomplete-items ui-autocomplete-list ui-widget-content ui-widget ui-corner-all')
+                .css({position: 'absolute', zIndex: 1000, display: 'none', listStyle: 'none', padding: 0})
+                .insertAfter($input),
+            timer = null,
+            request = null;
+
+        function label() {
+            var $chosen = $select.find('option:selected');
+            return $chosen.val() ? $chosen.text() : '';
+        }
+
+        function choose(id, text) {
+            $select.empty().append($('<option/>').val(id).text(text)).val(id).trigger('change');
+            $input.val(text);
+            $panel.hide();
+        }
+
+        function show(results) {
+            $panel.empty();
+            $.each(results, function (i, result) {
+                $('<li/>').addClass('ui-autocomplete-item ui-autocomplete-list-item ui-corner-all')
+                    .css({cursor: 'pointer', padding: '4px 8px'})
+                    .text(result.text)
+                    .on('mousedown', function (event) {
+                        event.preventDefault();
+                        choose(result.id, result.text);
+                    })
+                    .appendTo($panel);
+            });
+            $panel.css('min-width', $input.outerWidth()).toggle(results.length > 0);
+        }
+
+        $input.val(label()).on('input', function () {
+            var term = $.trim($input.val());
+            clearTimeout(timer);
+            if (!term) {
+                choose('', '');
+                return;
+            }
+            timer = setTimeout(function () {
+                if (request) {
+                    request.abort();
+                }
+                request = $.getJSON(url, {q: term}, function (data) {
+                    show(data.results);
+                });
+            }, delay);
+        }).on('blur', function () {
+            $panel.hide();
+            $input.val(label());
+        });
+    }
+
+    $(function () {
+        $('select[data-autocomplete]').each(function () {
+            attach(this);
+        });
+    });
+})(jQuery);